@@ -0,0 +1,138 @@
+"""Depth Map Projection Benchmark CLI.
+"""
+
+import sys
+import fire
+import numpy as np
+from time import perf_counter
+from traceback import format_exc
+from pathlib import Path
+from collections import Counter
+from tabulate import tabulate
+from pydnet.data.kitti_utils import (
+    generate_depth_map,
+    generate_depth_maps,
+    read_calibration,
+    sub2ind)
+
+
+def benchmark_depth_map(path_to_kitti, path_to_split, frames=50, repeat=3):
+    """Compares the projection engine against the reference implementation.
+    Args:
+        path_to_kitti (str): The path to the KITTI dataset.
+        path_to_split (str): The path to the split index.
+        frames (int): The number of sweeps to project.
+        repeat (int): The number of timed passes.
+    """
+    path_to_kitti = Path(path_to_kitti)
+    groups = {}
+    with open(Path(path_to_split) / "test_files.txt", "r") as f:
+        for line in f.read().splitlines()[:int(frames)]:
+            date, drive_id, _, _, frame_id = line.split("/")
+            groups.setdefault(date, []).append(
+                path_to_kitti
+                / date
+                / drive_id
+                / "velodyne_points"
+                / "data"
+                / "{:010d}.bin".format(int(frame_id)))
+
+    for date, velodynes in groups.items():
+        calibration = path_to_kitti / date
+        for velodyne in velodynes:
+            expected = reference_depth_map(
+                calibration, velodyne, 2, True).astype(np.float32)
+            actual = generate_depth_map(calibration, velodyne, 2, True)
+            if not np.array_equal(
+                    expected.view(np.uint32), actual.view(np.uint32)):
+                raise AssertionError(f"Depth maps differ: {velodyne}")
+
+    def reference():
+        for date, velodynes in groups.items():
+            for velodyne in velodynes:
+                reference_depth_map(
+                    path_to_kitti / date, velodyne, 2, True)
+
+    def batched():
+        for date, velodynes in groups.items():
+            generate_depth_maps(path_to_kitti / date, velodynes, 2, True)
+
+    n = sum(len(v) for v in groups.values())
+    table = []
+    for label, fn in [("reference", reference), ("batched", batched)]:
+        elapsed = min(timeit(fn) for _ in range(int(repeat)))
+        table.append([label, n, elapsed, 1000.0 * elapsed / n])
+    table.append(["speedup", "", table[0][2] / table[1][2], ""])
+    print(tabulate(
+        table,
+        headers=["implementation", "frames", "total [s]", "frame [ms]"]))
+
+
+def timeit(fn):
+    """Returns the wall clock time of a single call.
+    Args:
+        fn (callable): The function to be timed.
+    """
+    start = perf_counter()
+    fn()
+    return perf_counter() - start
+
+
+def reference_depth_map(calibration, velodyne, cam=2, vel_depth=False):
+    """The per-duplicate loop implementation the engine is checked against.
+    Args:
+        calibration (pathlib.Path): The path to the calibration directory.
+        velodyne (pathlib.Path): The path to the velodyne sweep.
+        cam (int): The camera index.
+        vel_depth (bool): Use velodyne depth instead of camera depth.
+    """
+    cam2cam = read_calibration(calibration / "calib_cam_to_cam.txt")
+    vel2cam = read_calibration(calibration / "calib_velo_to_cam.txt")
+    vel2cam = np.hstack(
+        (vel2cam['R'].reshape(3, 3), vel2cam['T'][..., np.newaxis]))
+    vel2cam = np.vstack(
+        (vel2cam, np.array([0, 0, 0, 1.0])))
+    im_shape = cam2cam["S_rect_02"][::-1].astype(np.int32)
+    R_cam2rect = np.eye(4)
+    R_cam2rect[:3, :3] = cam2cam['R_rect_00'].reshape(3, 3)
+    P_rect = cam2cam['P_rect_0'+str(cam)].reshape(3, 4)
+    P_vel2im = np.dot(np.dot(P_rect, R_cam2rect), vel2cam)
+    velo = np.fromfile(velodyne, dtype=np.float32).reshape(-1, 4)
+    velo[:, 3] = 1.0
+    velo = velo[velo[:, 0] >= 0, :]
+    velo_pts_im = np.dot(P_vel2im, velo.T).T
+    velo_pts_im[:, :2] =\
+        velo_pts_im[:, :2] / velo_pts_im[:, 2][..., np.newaxis]
+    if vel_depth:
+        velo_pts_im[:, 2] = velo[:, 0]
+    velo_pts_im[:, 0] = np.round(velo_pts_im[:, 0]) - 1
+    velo_pts_im[:, 1] = np.round(velo_pts_im[:, 1]) - 1
+    val_inds = (velo_pts_im[:, 0] >= 0) & (velo_pts_im[:, 1] >= 0)
+    val_inds =\
+        val_inds\
+        & (velo_pts_im[:, 0] < im_shape[1])\
+        & (velo_pts_im[:, 1] < im_shape[0])
+    velo_pts_im = velo_pts_im[val_inds, :]
+    depth = np.zeros((im_shape[:2]))
+    depth[
+        velo_pts_im[:, 1].astype(np.int64),
+        velo_pts_im[:, 0].astype(np.int64)
+    ] = velo_pts_im[:, 2]
+    inds = sub2ind(depth.shape, velo_pts_im[:, 1], velo_pts_im[:, 0])
+    dupe_inds = [item for item, count in Counter(inds).items() if count > 1]
+    for dd in dupe_inds:
+        pts = np.where(inds == dd)[0]
+        x_loc = int(velo_pts_im[pts[0], 0])
+        y_loc = int(velo_pts_im[pts[0], 1])
+        depth[y_loc, x_loc] = velo_pts_im[pts, 2].min()
+    depth[depth < 0] = 0
+    return depth
+
+
+if __name__ == "__main__":
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(benchmark_depth_map)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
@@ -0,0 +1,106 @@
+"""Console Script Startup Benchmark CLI.
+"""
+
+import re
+import sys
+import json
+import subprocess
+import fire
+import numpy as np
+from collections import defaultdict
+from traceback import format_exc
+from pathlib import Path
+from tabulate import tabulate
+
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def benchmark_startup(repeat=5, top=3, path_to_output=None):
+    """Measures the import time of every console script entry point.
+    Args:
+        repeat (int): The number of fresh interpreters per entry point.
+        top (int): The number of heaviest direct imports to report.
+        path_to_output (str): The path to the output JSON file, if any.
+    """
+    results = []
+    for script, module in entry_points(ROOT / "setup.py"):
+        totals = []
+        imports = defaultdict(list)
+        for _ in range(int(repeat)):
+            total, children = import_times(module)
+            totals.append(total)
+            for name, cumulative in children.items():
+                imports[name].append(cumulative)
+        heaviest = sorted(
+            ((np.median(v) / 1000.0, k) for k, v in imports.items()),
+            reverse=True)[:int(top)]
+        results.append({
+            "script": script,
+            "module": module,
+            "import": np.median(totals) / 1000.0,
+            "heaviest": {k: v for v, k in heaviest},
+        })
+    if path_to_output is not None:
+        with open(Path(path_to_output), "w") as f:
+            json.dump(results, f, indent=2)
+    print(tabulate(
+        [[r["script"], r["import"], ", ".join(
+            f"{k} {v:.0f}" for k, v in r["heaviest"].items())]
+         for r in results],
+        headers=["script", "import [ms]", "heaviest [ms]"]))
+
+
+def entry_points(path_to_setup):
+    """Returns the console scripts declared in setup.py.
+    Args:
+        path_to_setup (pathlib.Path): The path to setup.py.
+    Returns:
+        list: The (script, module) pairs.
+    """
+    return re.findall(
+        r'"(\w+)\s*=\s*([\w.]+):\w+"',
+        path_to_setup.read_text())
+
+
+def import_times(module):
+    """Imports a module in a fresh interpreter under `-X importtime`.
+    Args:
+        module (str): The module name.
+    Returns:
+        tuple: The cumulative import time in us of the module, and of each
+            module it imports directly.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True)
+    lines = []
+    for line in process.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|( +)(\S+)", line)
+        if match:
+            lines.append((
+                len(match.group(2)),
+                match.group(3),
+                int(match.group(1))))
+    # Imports are printed after everything they import, nested deeper.
+    index = [name for _, name, _ in lines].index(module)
+    depth, _, total = lines[index]
+    children = {}
+    for child_depth, name, cumulative in reversed(lines[:index]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 2:
+            children[name] = cumulative
+    return total, children
+
+
+if __name__ == "__main__":
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(benchmark_startup)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
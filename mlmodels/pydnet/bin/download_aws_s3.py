@@ -3,49 +3,48 @@
 
 import sys
 import fire
-import requests
 from traceback import format_exc
 from pathlib import Path
-from tqdm import tqdm
-from tempfile import NamedTemporaryFile
-from zipfile import ZipFile
+from download_utils import download_all, make_session, read_manifest
 
 
-def download_aws_s3(s3_region, s3_path, path):
+def download_aws_s3(
+    s3_region,
+    s3_path,
+    path,
+    manifest=None,
+    workers=4,
+    parallel=4,
+    scheme="https"
+):
     """Downloads a content from AWS S3 specified by a given path.
     Args:
         s3_region (str): The AWS S3 region.
-        s3_path (str): The path to the target file.
+        s3_path (str): The path to the target file, or the prefix of the
+            manifest entries.
         path (str): The path to the output file.
+        manifest (str): The path to a file listing the archives to
+            download below `s3_path`, with their size and digest if known.
+        workers (int): The number of concurrent downloads.
+        parallel (int): The number of ranged segments per download.
+        scheme (str): The URL scheme, `http` for a local stand-in.
     """
-    URL = f"https://{s3_region}/{s3_path}"
-    session = requests.Session()
-    response = session.get(
-        URL,
-        stream = True)
-    save(response, Path(path))
-
-
-def save(response, path):
-    """Saves downloaded content.
-    Args:
-        response (requests.Responce): GET response.
-        path (pathlib.Path): The path to the output file.
-    """
-    CHUNK_SIZE = 32768
-    progress = tqdm(
-        total=int(response.headers.get('content-length', 0)),
-        unit="iB",
-        unit_scale=True)
-    with NamedTemporaryFile() as tmp:
-        for chunk in response.iter_content(CHUNK_SIZE):
-            if chunk:
-                progress.update(len(chunk))
-                tmp.write(chunk)
-        tmp.flush()
-        with ZipFile(Path(tmp.name), "r") as zipped:
-            path.mkdir(parents=True, exist_ok=True)
-            zipped.extractall(path)
+    archives = [(s3_path, None, None)]
+    if manifest is not None:
+        archives = [
+            (f"{s3_path}/{name}", size, digest)
+            for name, size, digest in read_manifest(manifest)]
+    session = make_session(int(workers) * int(parallel))
+    download_all(
+        archives,
+        Path(path),
+        session,
+        lambda name, headers: session.get(
+            f"{scheme}://{s3_region}/{name}",
+            headers=headers,
+            stream=True),
+        int(workers),
+        int(parallel))
 
 
 if __name__ == "__main__":
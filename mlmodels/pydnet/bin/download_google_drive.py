@@ -3,33 +3,67 @@
 
 import sys
 import fire
-import requests
 from traceback import format_exc
 from pathlib import Path
-from tqdm import tqdm
-from tempfile import NamedTemporaryFile
-from zipfile import ZipFile
+from download_utils import download_all, make_session, read_manifest
 
 
-def download_google_drive(drive_id, path):
+URL = "https://docs.google.com/uc?export=download"
+
+
+def download_google_drive(
+    drive_id,
+    path,
+    manifest=None,
+    workers=4,
+    parallel=4
+):
     """Downloads a content from Google drive specified by a given id.
     Args:
-        drive_id (str): The Google drive identifier.
+        drive_id (str): The Google drive identifier, ignored if a manifest
+            is given.
         path (str): The path to the output file.
+        manifest (str): The path to a file listing Google drive
+            identifiers, with their size and digest if known.
+        workers (int): The number of concurrent downloads.
+        parallel (int): The number of ranged segments per download.
+    """
+    archives = [(drive_id, None, None)]
+    if manifest is not None:
+        archives = read_manifest(manifest)
+    session = make_session(int(workers) * int(parallel))
+    download_all(
+        archives,
+        Path(path),
+        session,
+        lambda id, headers: fetch(session, id, headers),
+        int(workers),
+        int(parallel))
+
+
+def fetch(session, drive_id, headers):
+    """Requests a content, confirming the virus scan warning if any.
+    Args:
+        session (requests.Session): The shared session.
+        drive_id (str): The Google drive identifier.
+        headers (dict): The request headers.
+    Returns:
+        requests.Response: The streamed GET response.
     """
-    URL = "https://docs.google.com/uc?export=download"
-    session = requests.Session()
     response = session.get(
         URL,
         params = { "id" : drive_id },
+        headers = headers,
         stream = True)
     token = get_token(response)
     if token:
+        response.close()
         response = session.get(
-            URL, 
+            URL,
             params = { "id" : drive_id, 'confirm' : token },
+            headers = headers,
             stream = True)
-    save(response, Path(path))
+    return response
 
 
 def get_token(response):
@@ -45,28 +79,6 @@ def get_token(response):
     return None
 
 
-def save(response, path):
-    """Saves downloaded content.
-    Args:
-        response (requests.Responce): GET response.
-        path (pathlib.Path): The path to the output file.
-    """
-    CHUNK_SIZE = 32768
-    progress = tqdm(
-        total=int(response.headers.get('content-length', 0)),
-        unit="iB",
-        unit_scale=True)
-    with NamedTemporaryFile() as tmp:
-        for chunk in response.iter_content(CHUNK_SIZE):
-            if chunk:
-                progress.update(len(chunk))
-                tmp.write(chunk)
-        tmp.flush()
-        with ZipFile(Path(tmp.name), "r") as zipped:
-            path.mkdir(parents=True, exist_ok=True)
-            zipped.extractall(path)
-
-
 if __name__ == "__main__":
     """A CLI entry point.
     """
@@ -0,0 +1,334 @@
+"""Download Utilities.
+"""
+
+import sys
+import json
+import hashlib
+import threading
+import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
+from tqdm import tqdm
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from zip_stream import CHUNK_SIZE, ChunkReader, extract_stream
+
+
+SEGMENT_SIZE = 8 << 20
+DIGESTS = {32: "md5", 40: "sha1", 64: "sha256"}
+RETRIES = 3
+
+
+class ShortRead(IOError):
+    """A response ended before the bytes it announced.
+    """
+
+
+def make_session(workers):
+    """Returns a session pooling up to `workers` connections per host.
+    Args:
+        workers (int): The number of concurrent downloads.
+    Returns:
+        requests.Session: A session retrying transient server errors.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=workers,
+        pool_maxsize=workers,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=1.0,
+            status_forcelist=(500, 502, 503, 504)))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def read_manifest(manifest):
+    """Reads the entries of a manifest.
+
+    Every line holds a name, optionally followed by the size in bytes and
+    the md5, sha1 or sha256 hex digest of the archive.
+    Args:
+        manifest (str): The path to the manifest file, `/dev/stdin` reads
+            a piped manifest.
+    Returns:
+        list: The (name, size, digest) tuples, `None` where not recorded.
+    """
+    entries = []
+    for line in Path(manifest).read_text().splitlines():
+        fields = line.split() + [None, None]
+        if fields[0] is not None:
+            size = None if fields[1] is None else int(fields[1])
+            entries.append((fields[0], size, fields[2]))
+    return entries
+
+
+def marker(path, name):
+    """Returns the file marking `name` as extracted into `path`.
+    Args:
+        path (pathlib.Path): The path to the output directory.
+        name (str): The name of the archive.
+    Returns:
+        pathlib.Path: The marker file.
+    """
+    return path / f".{Path(name).name}.done"
+
+
+def state(path, name):
+    """Returns the file recording where to resume `name`.
+    Args:
+        path (pathlib.Path): The path to the output directory.
+        name (str): The name of the archive.
+    Returns:
+        pathlib.Path: The state file.
+    """
+    return path / f".{Path(name).name}.part"
+
+
+class Progress(object):
+    """Aggregate progress of concurrent downloads.
+    """
+
+    def __init__(self, files):
+        """Inits `Progress` with the number of files.
+        """
+        self.lock = threading.Lock()
+        self.files = files
+        self.done = 0
+        self.starts = {}
+        self.counted = {}
+        self.bar = tqdm(total=0, unit="iB", unit_scale=True)
+        self.bar.set_postfix(files=f"0/{files}")
+
+    def expect(self, name, total, offset):
+        """Adds the bytes of `name` past `offset` to the total, once.
+
+        A retry resuming at `offset` rewinds the bytes counted past it,
+        as they are downloaded again.
+        """
+        with self.lock:
+            if name not in self.starts:
+                self.starts[name] = offset
+                self.counted[name] = 0
+                self.bar.total += (total or offset) - offset
+            elif offset < self.starts[name]:
+                self.bar.total += self.starts[name] - offset
+                self.starts[name] = offset
+            rewind = self.counted[name] - (offset - self.starts[name])
+            self.counted[name] -= rewind
+            self.bar.update(-rewind)
+
+    def update(self, name, size):
+        """Advances `name` by `size` downloaded bytes.
+        """
+        with self.lock:
+            self.counted[name] += size
+            self.bar.update(size)
+
+    def finish(self):
+        """Counts a finished file.
+        """
+        with self.lock:
+            self.done += 1
+            self.bar.set_postfix(files=f"{self.done}/{self.files}")
+
+    def close(self):
+        self.bar.close()
+
+
+def total_size(response, offset):
+    """Returns the size of the whole object behind a GET response.
+    Args:
+        response (requests.Responce): GET response.
+        offset (int): The first byte requested.
+    Returns:
+        int: The object size, `None` if unknown.
+    """
+    if "content-range" in response.headers:
+        # Either `bytes a-b/N`, `bytes a-b/*` or `bytes */N`.
+        size = response.headers["content-range"].rsplit("/", 1)[-1]
+        return int(size) if size.strip().isdigit() else None
+    if response.status_code != 206 and "content-length" in response.headers:
+        return int(response.headers["content-length"])
+    return None
+
+
+def segments(session, url, start, size, parallel):
+    """Yields ranged segments of an object in order.
+
+    Up to `parallel` segments are fetched ahead of the consumer.
+    Args:
+        session (requests.Session): The shared session.
+        url (str): The object URL.
+        start (int): The first byte.
+        size (int): The object size.
+        parallel (int): The number of segments in flight.
+    """
+    def get(begin):
+        end = min(begin + SEGMENT_SIZE, size) - 1
+        response = session.get(url, headers={"Range": f"bytes={begin}-{end}"})
+        response.raise_for_status()
+        if response.status_code != 206 or\
+                len(response.content) != end - begin + 1:
+            raise ShortRead(f"Bad range {begin}-{end} of {url}")
+        return response.content
+
+    offsets = iter(range(start, size, SEGMENT_SIZE))
+    with ThreadPoolExecutor(parallel) as executor:
+        pending = deque(executor.submit(get, begin)
+                        for begin in islice(offsets, parallel))
+        while pending:
+            data = pending.popleft().result()
+            for begin in islice(offsets, 1):
+                pending.append(executor.submit(get, begin))
+            yield data
+
+
+def save(name, size, digest, path, session, fetch, progress, parallel):
+    """Downloads an archive, extracting it while it streams in.
+
+    A dropped download resumes at the last entry boundary reached, as long
+    as the object is unchanged. Large objects are fetched in `parallel`
+    ranged segments. The size and digest, if recorded, are verified, the
+    digest only over an uninterrupted download.
+    Args:
+        name (str): The name of the archive.
+        size (int): The recorded size, if any.
+        digest (str): The recorded hex digest, if any.
+        path (pathlib.Path): The path to the output directory.
+        session (requests.Session): The shared session.
+        fetch (callable): Returns the streamed GET response of a name,
+            given the request headers.
+        progress (Progress): The aggregate progress.
+        parallel (int): The number of ranged segments in flight.
+    """
+    path.mkdir(parents=True, exist_ok=True)
+    resume = state(path, name)
+    saved = json.loads(resume.read_text()) if resume.exists() else {}
+    offset = saved.get("offset", 0)
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        if saved.get("etag"):
+            headers["If-Range"] = saved["etag"]
+
+    with fetch(name, headers) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            offset = 0
+        total = total_size(response, offset)
+        if size is not None and total is not None and total != size:
+            raise IOError(f"Expected {size} bytes, the server has {total}")
+        etag = response.headers.get("etag")
+        progress.expect(name, total, offset)
+        hasher = None
+        if digest is not None and offset == 0:
+            hasher = hashlib.new(DIGESTS[len(digest)])
+        elif digest is not None:
+            print(f"Resumed {name}, digest not verified", file=sys.stderr)
+
+        ranged = response.headers.get("accept-ranges") == "bytes"
+        if ranged and parallel > 1 and total is not None and\
+                total - offset > 2 * SEGMENT_SIZE:
+            response.close()
+            chunks = segments(session, response.url, offset, total, parallel)
+        else:
+            chunks = response.iter_content(CHUNK_SIZE)
+
+        def counted(chunks):
+            for chunk in chunks:
+                if hasher is not None:
+                    hasher.update(chunk)
+                progress.update(name, len(chunk))
+                yield chunk
+
+        last = offset
+
+        def checkpoint(position):
+            nonlocal last
+            if position - last >= CHUNK_SIZE:
+                resume.write_text(json.dumps({
+                    "offset": position,
+                    "etag": etag,
+                }))
+                last = position
+
+        reader = ChunkReader(counted(chunks), offset)
+        extract_stream(reader, path, checkpoint)
+        reader.drain()
+
+    if total is not None and reader.offset != total:
+        raise ShortRead(f"Expected {total} bytes, got {reader.offset}")
+    if resume.exists():
+        resume.unlink()
+    if hasher is not None and hasher.hexdigest() != digest.lower():
+        raise IOError(f"Digest mismatch: {name}")
+
+
+def retryable(error):
+    """Returns whether a failed download is worth resuming.
+    Args:
+        error (Exception): The error the download failed with.
+    Returns:
+        bool: Whether it is a transient network or server error.
+    """
+    if isinstance(error, requests.HTTPError):
+        response = error.response
+        return response is not None and response.status_code >= 500
+    return isinstance(error, (
+        requests.ConnectionError,
+        requests.exceptions.ChunkedEncodingError,
+        requests.exceptions.RetryError,
+        ShortRead,
+        EOFError))
+
+
+def download_all(archives, path, session, fetch, workers=4, parallel=4):
+    """Downloads and extracts archives concurrently.
+
+    Archives extracted by a previous run are skipped, at most `workers`
+    downloads are in flight at once. A dropped connection, a short read
+    or a server error is resumed up to `RETRIES` times.
+    Args:
+        archives (list): The (name, size, digest) tuples of the archives.
+        path (pathlib.Path): The path to the output directory.
+        session (requests.Session): The shared session.
+        fetch (callable): Returns the streamed GET response of a name,
+            given the request headers.
+        workers (int): The number of concurrent downloads.
+        parallel (int): The number of ranged segments per download.
+    """
+    pending = [a for a in archives if not marker(path, a[0]).exists()]
+    if len(pending) < len(archives):
+        print(
+            f"Skipping {len(archives) - len(pending)} extracted archives",
+            file=sys.stderr)
+    progress = Progress(len(pending))
+    failures = []
+
+    def download(name, size, digest):
+        for attempt in range(RETRIES):
+            try:
+                save(name, size, digest, path, session, fetch, progress,
+                     parallel)
+                break
+            except Exception as e:
+                if attempt == RETRIES - 1 or not retryable(e):
+                    raise
+        marker(path, name).touch()
+        progress.finish()
+
+    with ThreadPoolExecutor(workers) as executor:
+        futures = {executor.submit(download, *a): a[0] for a in pending}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failures.append(futures[future])
+                print(f"Failed {futures[future]}: {e}", file=sys.stderr)
+    progress.close()
+    if failures:
+        raise RuntimeError(f"{len(failures)} downloads failed: {failures}")
@@ -0,0 +1,150 @@
+"""Streaming Zip Extraction.
+"""
+
+import os
+import zlib
+import struct
+from zipfile import BadZipFile
+
+
+LOCAL_HEADER = 0x04034b50
+CENTRAL_HEADER = 0x02014b50
+END_OF_ARCHIVE = 0x06054b50
+DATA_DESCRIPTOR = 0x08074b50
+ZIP64_EXTRA = 0x0001
+MASK_32 = 0xffffffff
+CHUNK_SIZE = 1 << 20
+
+
+class ChunkReader(object):
+    """Reads exact byte counts from an iterator of chunks.
+    """
+
+    def __init__(self, chunks, offset=0):
+        """Inits `ChunkReader` with `chunks` starting at `offset`.
+        """
+        self.chunks = iter(chunks)
+        self.buffer = bytearray()
+        self.offset = offset
+
+    def read_some(self, size=CHUNK_SIZE):
+        """Reads up to `size` bytes, fewer only at the end of the stream.
+        """
+        if not self.buffer:
+            self.buffer += next(self.chunks, b"")
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        self.offset += len(data)
+        return data
+
+    def read(self, size):
+        """Reads exactly `size` bytes.
+        """
+        while len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                raise EOFError(
+                    f"Truncated at {self.offset + len(self.buffer)}")
+            self.buffer += chunk
+        return self.read_some(size)
+
+    def unread(self, data):
+        """Pushes back bytes read past the end of an entry.
+        """
+        self.buffer[:0] = data
+        self.offset -= len(data)
+
+    def drain(self):
+        """Reads up to the end of the stream.
+        """
+        while self.read_some():
+            pass
+
+
+def extract_stream(reader, path, checkpoint=None):
+    """Extracts a zip archive while it is being read.
+
+    Local headers are parsed in stream order, so the central directory is
+    never needed. The CRC-32 and size of every entry is verified, and each
+    entry is written atomically.
+    Args:
+        reader (ChunkReader): The archive bytes, starting at a local header.
+        path (pathlib.Path): The path to the output directory.
+        checkpoint (callable): Called with the offset of every local header
+            reached, a later stream may start there.
+    """
+    root = path.resolve()
+    while True:
+        if checkpoint is not None:
+            checkpoint(reader.offset)
+        signature, = struct.unpack("<I", reader.read(4))
+        if signature in (CENTRAL_HEADER, END_OF_ARCHIVE):
+            reader.unread(struct.pack("<I", signature))
+            return
+        if signature != LOCAL_HEADER:
+            raise BadZipFile(f"Bad local header at {reader.offset - 4}")
+        extract_entry(reader, root)
+
+
+def extract_entry(reader, root):
+    """Extracts a single entry following its local header signature.
+    Args:
+        reader (ChunkReader): The archive bytes.
+        root (pathlib.Path): The resolved path to the output directory.
+    """
+    (_, flags, method, _, _, crc, csize, usize, name_size,
+     extra_size) = struct.unpack("<HHHHHIIIHH", reader.read(26))
+    encoding = "utf-8" if flags & 0x800 else "cp437"
+    name = reader.read(name_size).decode(encoding)
+    extra = reader.read(extra_size)
+    zip64 = False
+    while len(extra) >= 4:
+        key, size = struct.unpack("<HH", extra[:4])
+        if key == ZIP64_EXTRA:
+            zip64 = True
+            values = iter(struct.unpack(f"<{size // 8}Q", extra[4:4 + size]))
+            if usize == MASK_32:
+                usize = next(values)
+            if csize == MASK_32:
+                csize = next(values)
+        extra = extra[4 + size:]
+
+    target = (root / name).resolve()
+    if root not in target.parents:
+        raise BadZipFile(f"Unsafe entry name: {name}")
+    if name.endswith("/"):
+        target.mkdir(parents=True, exist_ok=True)
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    partial = target.with_name(f".{target.name}.partial")
+    checksum, written = 0, 0
+    with open(partial, "wb") as f:
+        if method == 8:
+            inflate = zlib.decompressobj(-zlib.MAX_WBITS)
+            while not inflate.eof:
+                data = reader.read_some()
+                if not data:
+                    raise EOFError(f"Truncated entry: {name}")
+                out = inflate.decompress(data)
+                checksum = zlib.crc32(out, checksum)
+                written += f.write(out)
+            reader.unread(inflate.unused_data)
+        elif method == 0 and not flags & 0x08:
+            for _ in range(0, csize, CHUNK_SIZE):
+                out = reader.read(min(CHUNK_SIZE, csize - written))
+                checksum = zlib.crc32(out, checksum)
+                written += f.write(out)
+        else:
+            raise BadZipFile(f"Unsupported compression {method}: {name}")
+
+    if flags & 0x08:
+        descriptor = reader.read(4)
+        if struct.unpack("<I", descriptor)[0] == DATA_DESCRIPTOR:
+            descriptor = reader.read(4)
+        crc, = struct.unpack("<I", descriptor)
+        sizes = "<QQ" if zip64 else "<II"
+        _, usize = struct.unpack(sizes, reader.read(struct.calcsize(sizes)))
+    if checksum != crc or written != usize:
+        os.remove(partial)
+        raise BadZipFile(f"Corrupt entry: {name}")
+    os.replace(partial, target)
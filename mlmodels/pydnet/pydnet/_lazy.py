@@ -0,0 +1,50 @@
+"""Lazy Package Exports.
+"""
+
+import sys
+from importlib import import_module
+from types import ModuleType
+from typing import Callable, Dict, List, Tuple
+
+
+class LazyPackage(ModuleType):
+    """Package whose exports may share the name of their submodule.
+
+    Importing a submodule binds it to its package, which would shadow the
+    export of the same name, as in `pydnet.cli.evaluate_kitti`.
+    """
+
+    def __setattr__(self, name, value):
+        if isinstance(value, ModuleType) and\
+                value.__name__ == f"{self.__name__}.{name}" and\
+                name in getattr(self, "__all__", ()):
+            return
+        super().__setattr__(name, value)
+
+
+def lazy(
+    package: str,
+    submodules: Dict[str, str]
+) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """Returns the `__getattr__` and `__dir__` of a lazily importing package.
+
+    Each name of `submodules` is imported from its relative submodule on
+    first access only.
+    """
+    module = sys.modules[package]
+    module.__class__ = LazyPackage
+
+    def __getattr__(name):
+        """Imports `name` from its submodule on first access.
+        """
+        if name not in submodules:
+            raise AttributeError(
+                f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(submodules[name], package), name)
+        vars(module)[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(vars(module)) | set(submodules))
+
+    return __getattr__, __dir__
@@ -1,9 +1,22 @@
 """Command Line Interface.
+
+Commands are imported on first access only, each console script imports
+its own module.
 """
 
-from .generate_kitti_ground_truth import generate_kitti_ground_truth
+from pydnet._lazy import lazy
+
+
+_SUBMODULES = {
+    "evaluate_kitti": ".evaluate_kitti",
+    "generate_kitti_ground_truth": ".generate_kitti_ground_truth",
+}
 
 
 __all__ = [
+    "evaluate_kitti",
     "generate_kitti_ground_truth"
 ]
+
+
+__getattr__, __dir__ = lazy(__name__, _SUBMODULES)
@@ -0,0 +1,89 @@
+"""PyDnet Worker Pool Benchmark CLI.
+"""
+
+import sys
+import json
+import time
+import fire
+import numpy as np
+from traceback import format_exc
+from pathlib import Path
+from tabulate import tabulate
+from pydnet.models.quantize_utils import FrozenGraphPredictor
+from pydnet.models.graph_utils import graph_outputs, load_graph
+from pydnet.serving import WorkerPool
+
+
+def benchmark_pool(
+    path_to_pb,
+    path_to_output,
+    workers=(1, 2, 4),
+    threads=1,
+    frames=200,
+    affinity=True,
+    policy="round_robin"
+):
+    """Compares the worker pool throughput against a single session.
+    Args:
+        path_to_pb (str): The path to the frozen graph.
+        path_to_output (str): The path to the output JSON file.
+        workers (list): The numbers of workers to benchmark.
+        threads (int): The intra-op threads of every worker.
+        frames (int): The number of frames per run.
+        affinity (bool): Pins every worker to its own cores.
+        policy (str): `round_robin` or `least_loaded`.
+    """
+    path_to_pb = Path(path_to_pb)
+    graph_def = load_graph(path_to_pb)
+    shape = [
+        node.attr["shape"].shape.dim for node in graph_def.node
+        if node.name == "In"][0]
+    shape = [max(d.size, 1) for d in shape]
+    image = np.random.uniform(0, 255, shape).astype(np.float32)
+
+    predictor = FrozenGraphPredictor(
+        path_to_pb, "In", graph_outputs(graph_def)[0])
+    predictor(image)
+    start = time.perf_counter()
+    for _ in range(int(frames)):
+        predictor(image)
+    results = [{
+        "mode": "single session",
+        "workers": 1,
+        "throughput": int(frames) / (time.perf_counter() - start),
+    }]
+
+    for n in workers:
+        with WorkerPool(
+                path_to_pb,
+                int(n),
+                int(threads),
+                bool(affinity),
+                policy) as pool:
+            list(pool.map(image for _ in range(int(n))))
+            start = time.perf_counter()
+            for _ in pool.map(image for _ in range(int(frames))):
+                pass
+            results.append({
+                "mode": "worker pool",
+                "workers": int(n),
+                "throughput": int(frames) / (time.perf_counter() - start),
+            })
+
+    for result in results:
+        result["speedup"] = result["throughput"] / results[0]["throughput"]
+    with open(Path(path_to_output), "w") as f:
+        json.dump(results, f, indent=2)
+    print(tabulate(
+        [[r["mode"], r["workers"], r["throughput"], r["speedup"]]
+         for r in results],
+        headers=["mode", "workers", "frames/sec", "speedup"]))
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(benchmark_pool)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
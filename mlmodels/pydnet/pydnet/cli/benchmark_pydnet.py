@@ -0,0 +1,239 @@
+"""PyDnet Inference Benchmark CLI.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import fire
+import numpy as np
+import tensorflow as tf
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from multiprocessing import get_context
+from traceback import format_exc
+from pathlib import Path
+from tabulate import tabulate
+from tqdm import tqdm
+from pydnet.models import Pydnet
+from pydnet.models.graph_utils import graph_outputs, load_graph
+from pydnet.models.pydnet import architecture
+
+
+def benchmark_pydnet(
+    path_to_output,
+    path_to_checkpoint=None,
+    path_to_pb=None,
+    resolutions=((320, 640),),
+    batches=(1,),
+    intra_op_threads=(0,),
+    inter_op_threads=(0,),
+    widths=(1.0,),
+    levels=(6,),
+    runs=100,
+    warmup=10
+):
+    """Benchmarks PyDnet inference over a sweep of configurations.
+    Args:
+        path_to_output (str): The path to the output JSON file.
+        path_to_checkpoint (str): The path to the checkpoint file, random
+            weights are used if neither this nor `path_to_pb` is given. It
+            must match every width and level of the sweep.
+        path_to_pb (str): The path to a frozen graph, whose resolution
+            takes precedence over `resolutions`.
+        resolutions (list): The (h, w) input resolutions.
+        batches (list): The batch sizes.
+        intra_op_threads (list): The intra-op thread counts, 0 for default.
+        inter_op_threads (list): The inter-op thread counts, 0 for default.
+        widths (list): The encoder width multipliers, ignored for frozen
+            graphs.
+        levels (list): The pyramid depths, ignored for frozen graphs.
+        runs (int): The number of timed runs per configuration.
+        warmup (int): The number of untimed runs per configuration.
+    """
+    if path_to_pb is not None:
+        resolutions = [(None, None)]
+        widths, levels = [None], [None]
+        frozen = input_batch(load_graph(Path(path_to_pb)))
+        if frozen is not None and any(int(b) != frozen for b in batches):
+            raise ValueError(
+                f"{path_to_pb} is frozen with a batch of {frozen}")
+    configs = list(product(
+        resolutions,
+        batches,
+        intra_op_threads,
+        inter_op_threads,
+        widths,
+        levels))
+    results = []
+    for (h, w), batch, intra, inter, width, depth in tqdm(configs):
+        # Each configuration runs in a fresh process to isolate peak RSS.
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as ex:
+            results.append(ex.submit(
+                run_config,
+                h,
+                w,
+                int(batch),
+                int(intra),
+                int(inter),
+                int(runs),
+                int(warmup),
+                path_to_checkpoint,
+                path_to_pb,
+                width,
+                depth).result())
+    report = {
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "tensorflow": tf.__version__,
+        },
+        "model": {
+            "checkpoint": path_to_checkpoint,
+            "pb": path_to_pb,
+        },
+        "results": results,
+    }
+    with open(Path(path_to_output), "w") as f:
+        json.dump(report, f, indent=2)
+    print(tabulate(
+        [[r["h"], r["w"], r["batch"], r["intra_op_threads"],
+          r["inter_op_threads"], r["width"], r["levels"], r["gflops"],
+          r["parameters"], r["latency"]["p50"], r["latency"]["p95"],
+          r["latency"]["p99"], r["throughput"], r["peak_rss"]]
+         for r in results],
+        headers=["h", "w", "batch", "intra", "inter", "width", "levels",
+                 "GFLOPs", "params [M]", "p50 [ms]", "p95 [ms]", "p99 [ms]",
+                 "images/sec", "rss [MB]"]))
+
+
+def run_config(
+    h,
+    w,
+    batch,
+    intra,
+    inter,
+    runs,
+    warmup,
+    path_to_checkpoint=None,
+    path_to_pb=None,
+    width=None,
+    levels=None
+):
+    """Benchmarks a single configuration, runs in a worker process.
+    Args:
+        h (int): The image height.
+        w (int): The image width.
+        batch (int): The batch size.
+        intra (int): The intra-op thread count.
+        inter (int): The inter-op thread count.
+        runs (int): The number of timed runs.
+        warmup (int): The number of untimed runs.
+        path_to_checkpoint (str): The path to the checkpoint file.
+        path_to_pb (str): The path to a frozen graph.
+        width (float): The encoder width multiplier.
+        levels (int): The pyramid depth.
+    Returns:
+        dict: The latency percentiles, throughput, peak RSS and, unless
+            frozen, the network complexity.
+    """
+    gflops, parameters = None, None
+    graph = tf.Graph()
+    with graph.as_default():
+        if path_to_pb is not None:
+            graph_def = load_graph(Path(path_to_pb))
+            tf.import_graph_def(graph_def, name="")
+            input = graph.get_tensor_by_name("In:0")
+            output = graph.get_tensor_by_name(
+                f"{graph_outputs(graph_def)[0]}:0")
+            _, h, w, _ = input.shape.as_list()
+        else:
+            input = tf.placeholder(tf.float32, [None, h, w, 3], name="In")
+            network = Pydnet({
+                "h": h,
+                "w": w,
+                "is_training": False,
+                **architecture(width, levels),
+            })
+            network.forward(input)
+            output = network.output_nodes[0]
+            gflops = network.flops / 1e9
+            parameters = network.parameters / 1e6
+            saver = tf.train.Saver()
+            initializer = tf.global_variables_initializer()
+    config = tf.ConfigProto(
+        intra_op_parallelism_threads=intra,
+        inter_op_parallelism_threads=inter)
+    image = np.random.uniform(0, 255, [batch, h, w, 3]).astype(np.float32)
+    latencies = []
+    with tf.Session(graph=graph, config=config) as sess:
+        if path_to_pb is None and path_to_checkpoint is not None:
+            saver.restore(sess, str(path_to_checkpoint))
+        elif path_to_pb is None:
+            sess.run(initializer)
+        for i in range(warmup + runs):
+            start = time.perf_counter()
+            sess.run(output, {input: image})
+            if i >= warmup:
+                latencies.append(time.perf_counter() - start)
+    latencies = 1000.0 * np.array(latencies)
+    return {
+        "h": h,
+        "w": w,
+        "batch": batch,
+        "intra_op_threads": intra,
+        "inter_op_threads": inter,
+        "width": width,
+        "levels": levels,
+        "gflops": gflops,
+        "parameters": parameters,
+        "runs": runs,
+        "warmup": warmup,
+        "latency": {
+            "mean": float(latencies.mean()),
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "p99": float(np.percentile(latencies, 99)),
+        },
+        "throughput": 1000.0 * batch * runs / float(latencies.sum()),
+        "peak_rss": peak_rss() / 2 ** 20,
+    }
+
+
+def input_batch(graph_def):
+    """Returns the batch size the `In` placeholder is frozen with.
+    Args:
+        graph_def (tf.GraphDef): The frozen graph.
+    Returns:
+        int: The batch size, `None` if the batch axis is dynamic.
+    """
+    for node in graph_def.node:
+        if node.name == "In":
+            dims = node.attr["shape"].shape.dim
+            if dims and dims[0].size >= 0:
+                return dims[0].size
+    return None
+
+
+def peak_rss():
+    """Returns the peak RSS of the process in bytes.
+
+    Unlike sampling the RSS between runs, the kernel high-water mark
+    includes the peak reached while a run is in flight.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(benchmark_pydnet)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
@@ -0,0 +1,104 @@
+"""KITTI Evaluation CLI.
+"""
+
+import sys
+import fire
+import numpy as np
+import tensorflow as tf
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from traceback import format_exc
+from pathlib import Path
+from tabulate import tabulate
+from tqdm import tqdm
+from pydnet.data import AUTOTUNE, KITTI, SparseDepthReader
+from pydnet.eval import METRICS, DepthMetrics
+from pydnet.eval.scoring import score
+from pydnet.models import Pydnet
+from pydnet.models.pydnet import architecture
+
+
+def evaluate_kitti(
+    path_to_kitti,
+    path_to_split,
+    path_to_checkpoint,
+    h=320,
+    w=640,
+    batch_size=1,
+    workers=4,
+    max_depth=80.0,
+    path_to_output=None,
+    width=1.0,
+    levels=6,
+    estimator=None
+):
+    """Evaluates the PyDnet model on the KITTI dataset.
+    Args:
+        path_to_kitti (str): The path to the KITTI dataset.
+        path_to_split (str): The path to the split index.
+        path_to_checkpoint (str): The path to the checkpoint file.
+        h (int): The image height.
+        w (int): The image width.
+        batch_size (int): The inference batch size.
+        workers (int): The number of scoring threads.
+        max_depth (float): The maximum depth value.
+        path_to_output (str): The path to write predictions to, if any.
+        width (float): The encoder width multiplier of the checkpoint.
+        levels (int): The pyramid depth of the checkpoint.
+        estimator (list): The estimator channels of the checkpoint, the
+            published profile if not given.
+    """
+    path_to_split = Path(path_to_split)
+    ground = SparseDepthReader(path_to_split / "depths")
+    dataset = KITTI({
+        "h": int(h),
+        "w": int(w),
+        "path": Path(path_to_kitti),
+        "slice": path_to_split / "test_files.txt",
+        "batch_size": int(batch_size),
+        "workers": AUTOTUNE,
+    })
+    network = Pydnet({
+        "h": int(h),
+        "w": int(w),
+        "is_training": False,
+        **architecture(width, levels, estimator),
+    })
+    pred = tf.nn.relu(network.forward(dataset.batch * 255.0))
+    if path_to_output is not None:
+        path_to_output = Path(path_to_output)
+        path_to_output.mkdir(parents=True, exist_ok=True)
+    metrics = DepthMetrics(float(max_depth))
+    pending = deque()
+    with tf.Session() as sess,\
+            ThreadPoolExecutor(int(workers)) as pool,\
+            tqdm(total=len(ground)) as progress:
+        sess.run(dataset.initializer)
+        tf.train.Saver().restore(sess, str(path_to_checkpoint))
+        for start in range(0, len(ground), int(batch_size)):
+            deps = sess.run(pred)[:len(ground) - start]
+            for i, dep in enumerate(deps, start):
+                pending.append(pool.submit(
+                    score,
+                    metrics,
+                    np.squeeze(dep, -1),
+                    ground,
+                    i,
+                    path_to_output))
+            while len(pending) > 2 * int(workers):
+                metrics.add(pending.popleft().result())
+                progress.update(1)
+        while pending:
+            metrics.add(pending.popleft().result())
+            progress.update(1)
+    result = metrics.result()
+    print(tabulate([[name, result[name]] for name in METRICS]))
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(evaluate_kitti)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
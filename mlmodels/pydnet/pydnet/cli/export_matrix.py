@@ -0,0 +1,202 @@
+"""PyDnet Multi-Resolution Exporter CLI.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import fire
+import coremltools as ct
+import tensorflow as tf
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from multiprocessing import get_context
+from traceback import format_exc
+from pathlib import Path
+from tabulate import tabulate
+from pydnet.cli.update_mlmodel import update_spec
+from pydnet.models import freeze_pydnet_graph
+from pydnet.models.graph_utils import graph_outputs
+from pydnet.models.pydnet import architecture
+
+
+def export_matrix(
+    name,
+    path_to_checkpoint,
+    path_to_output,
+    resolutions=((384, 640),),
+    exit_levels=(1,),
+    resize=(True,),
+    optimize=False,
+    width=1.0,
+    levels=6,
+    estimator=None,
+    workers=2
+):
+    """Exports updated Core ML models for a matrix of export options.
+
+    Artifacts are cached under `path_to_output/cache` by the checkpoint
+    digest and the export options, up to date variants are not rebuilt.
+    Args:
+        name(str): The name of the architecture.
+        path_to_checkpoint (str): The path to the checkpoint file.
+        path_to_output (str): The path to the output directory.
+        resolutions (list): The (h, w) input resolutions.
+        exit_levels (list): The pyramid levels the decoder stops at.
+        resize (list): Whether the output is resized to the image size.
+        optimize (bool): Optimizes the frozen graphs before conversion.
+        width (float): The encoder width multiplier of the checkpoint.
+        levels (int): The pyramid depth of the checkpoint.
+        estimator (list): The estimator channels of the checkpoint, the
+            published profile if not given.
+        workers (int): The number of export processes.
+    """
+    path_to_output = Path(path_to_output)
+    cache = path_to_output / "cache"
+    cache.mkdir(parents=True, exist_ok=True)
+    digest = checkpoint_digest(Path(path_to_checkpoint))
+    variants = []
+    for (h, w), exit_level, resized in product(
+            resolutions, exit_levels, resize):
+        params = {
+            "name": name,
+            "h": int(h),
+            "w": int(w),
+            "exit_level": int(exit_level),
+            "resize": bool(resized),
+            "optimize": bool(optimize),
+            "architecture": architecture(width, levels, estimator),
+            "checkpoint": digest,
+            "tensorflow": tf.__version__,
+            "coremltools": ct.__version__,
+        }
+        key = hashlib.sha256(
+            json.dumps(params, sort_keys=True).encode()).hexdigest()
+        suffix = "" if resized else "_raw"
+        target = path_to_output /\
+            f"{name}_{int(h)}x{int(w)}_L{int(exit_level)}{suffix}.mlmodel"
+        variants.append((params, cache / f"{key}.mlmodel", target))
+
+    rows = []
+    context = get_context("spawn")
+    with ProcessPoolExecutor(int(workers), mp_context=context) as executor:
+        futures = {}
+        for params, artifact, target in variants:
+            if artifact.exists():
+                rows.append(publish(params, artifact, target, 0.0, True))
+            else:
+                futures[executor.submit(
+                    export_variant,
+                    params,
+                    Path(path_to_checkpoint),
+                    artifact)] = (params, artifact, target)
+        for future in as_completed(futures):
+            params, artifact, target = futures[future]
+            rows.append(publish(
+                params, artifact, target, future.result(), False))
+    rows.sort()
+    print(tabulate(
+        rows,
+        headers=["h", "w", "exit", "resize", "cached", "time [s]",
+                 "size [MB]", "model"]))
+
+
+def export_variant(params, path_to_checkpoint, artifact):
+    """Freezes, converts and updates a single variant in memory, runs in a
+    worker process.
+    Args:
+        params (dict): The export options.
+        path_to_checkpoint (pathlib.Path): The path to the checkpoint file.
+        artifact (pathlib.Path): The path to the cached model.
+    Returns:
+        float: The export time in seconds.
+    """
+    start = time.perf_counter()
+    graph_def = freeze_pydnet_graph(
+        params["h"],
+        params["w"],
+        path_to_checkpoint,
+        optimize=params["optimize"],
+        exit_level=params["exit_level"],
+        resize=params["resize"],
+        report=False,
+        architecture=params["architecture"])
+    graph = tf.Graph()
+    with graph.as_default():
+        tf.import_graph_def(graph_def, name="")
+    model = ct.convert(
+        graph,
+        inputs=[ct.ImageType()],
+        outputs=graph_outputs(graph_def))
+    model = update_spec(
+        model.get_spec(),
+        params["name"],
+        params["h"],
+        params["w"],
+        params["exit_level"],
+        params["resize"])
+    partial = artifact.with_suffix(".partial.mlmodel")
+    model.save(str(partial))
+    os.replace(partial, artifact)
+    return time.perf_counter() - start
+
+
+def publish(params, artifact, target, seconds, cached):
+    """Links a cached model to its output name.
+    Args:
+        params (dict): The export options.
+        artifact (pathlib.Path): The path to the cached model.
+        target (pathlib.Path): The path to the output model.
+        seconds (float): The export time in seconds.
+        cached (bool): Whether the model was already cached.
+    Returns:
+        list: The report row.
+    """
+    if not target.exists() or not target.samefile(artifact):
+        partial = target.with_suffix(".partial.mlmodel")
+        if partial.exists():
+            partial.unlink()
+        os.link(artifact, partial)
+        os.replace(partial, target)
+    return [
+        params["h"],
+        params["w"],
+        params["exit_level"],
+        params["resize"],
+        cached,
+        seconds,
+        artifact.stat().st_size / 2 ** 20,
+        target.name]
+
+
+def checkpoint_digest(path_to_checkpoint):
+    """Hashes the files of a TensorFlow checkpoint.
+    Args:
+        path_to_checkpoint (pathlib.Path): The checkpoint prefix.
+    Returns:
+        str: The sha256 hex digest.
+    """
+    digest = hashlib.sha256()
+    files = sorted(path_to_checkpoint.parent.glob(
+        f"{path_to_checkpoint.name}.*"))
+    if not files:
+        raise FileNotFoundError(f"No checkpoint at {path_to_checkpoint}")
+    for path in files:
+        if path.suffix == ".meta":
+            # The graph is rebuilt from code, only the weights matter.
+            continue
+        digest.update(path.name.encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(export_matrix)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
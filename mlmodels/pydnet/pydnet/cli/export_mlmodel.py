@@ -3,13 +3,45 @@
 
 import sys
 import fire
+import numpy as np
+import tensorflow as tf
 import coremltools as ct
 from traceback import format_exc
 from pathlib import Path
+from tabulate import tabulate
+from pydnet.data import KITTI, SparseDepthReader
+from pydnet.eval import DepthMetrics
+from pydnet.eval.scoring import score
 from pydnet.models import freeze_pydnet
+from pydnet.models.pydnet import architecture
+from pydnet.models.graph_utils import graph_outputs, load_graph
+from pydnet.models.quantize_utils import (
+    FrozenGraphPredictor,
+    MLModelPredictor,
+    TFLitePredictor,
+    convert_tflite,
+    profile_predictor,
+    quantize_mlmodel)
 
 
-def export_mlmodel(name, h, w, path_to_checkpoint, path_to_output):
+def export_mlmodel(
+    name,
+    h,
+    w,
+    path_to_checkpoint,
+    path_to_output,
+    optimize=False,
+    exit_level=1,
+    resize=True,
+    width=1.0,
+    levels=6,
+    estimator=None,
+    quantize=False,
+    path_to_kitti=None,
+    path_to_split=None,
+    samples=100,
+    frames=200
+):
     """Freezes the PyDnet model.
     Args:
         name(str): The name of the architecture.
@@ -17,15 +49,225 @@ def export_mlmodel(name, h, w, path_to_checkpoint, path_to_output):
         w (int): The image wodth.
         path_to_checkpoint (str): The path to the checkpoint file.
         path_to_output (str): The path to the output directory.
+        optimize (bool): Optimizes the frozen graph before conversion.
+        exit_level (int): The pyramid level the decoder stops at.
+        resize (bool): Resizes the output to the image size.
+        width (float): The encoder width multiplier of the checkpoint.
+        levels (int): The pyramid depth of the checkpoint.
+        estimator (list): The estimator channels of the checkpoint, the
+            published profile if not given.
+        quantize (bool): Exports weight-quantized Core ML and TFLite models.
+        path_to_kitti (str): The path to the KITTI dataset, used for int8
+            calibration and accuracy.
+        path_to_split (str): The path to the split index.
+        samples (int): The number of KITTI frames to calibrate int8 on.
+        frames (int): The number of KITTI frames to evaluate on.
     """
+    if quantize and (path_to_kitti is None) != (path_to_split is None):
+        raise ValueError(
+            "Calibration needs both path_to_kitti and path_to_split")
     path_to_pb = freeze_pydnet(
         name,
         int(h),
         int(w),
         Path(path_to_checkpoint),
-        Path(path_to_output))
+        Path(path_to_output),
+        optimize=bool(optimize),
+        exit_level=int(exit_level),
+        resize=bool(resize),
+        architecture=architecture(width, levels, estimator))
     model = ct.convert(str(path_to_pb), inputs=[ct.ImageType()])
     model.save(str(path_to_pb).replace("pb", "mlmodel"))
+    if quantize:
+        export_quantized(
+            path_to_pb,
+            model,
+            int(h),
+            int(w),
+            path_to_kitti,
+            path_to_split,
+            int(samples),
+            int(frames))
+
+
+def export_quantized(
+    path_to_pb,
+    model,
+    h,
+    w,
+    path_to_kitti,
+    path_to_split,
+    samples,
+    frames
+):
+    """Exports quantized variants and reports size, latency and accuracy.
+    Args:
+        path_to_pb (pathlib.Path): The path to the frozen graph.
+        model (coremltools.models.MLModel): The float32 Core ML model.
+        h (int): The image height.
+        w (int): The image wodth.
+        path_to_kitti (str): The path to the KITTI dataset.
+        path_to_split (str): The path to the split index.
+        samples (int): The number of KITTI frames to calibrate int8 on.
+        frames (int): The number of KITTI frames to evaluate on.
+    """
+    output = graph_outputs(load_graph(path_to_pb))[0]
+    variants = [("tf float32", path_to_pb, FrozenGraphPredictor(
+        path_to_pb, "In", output))]
+    variants += mlmodel_variants(path_to_pb, model)
+    variants += tflite_variants(
+        path_to_pb,
+        output,
+        h,
+        w,
+        path_to_kitti,
+        path_to_split,
+        samples)
+    metrics = score_variants(
+        variants,
+        h,
+        w,
+        path_to_kitti,
+        path_to_split,
+        frames)
+
+    image = np.random.uniform(0, 255, [1, h, w, 3]).astype(np.float32)
+    table = []
+    for label, path, predictor in variants:
+        result = metrics[label].result()
+        evaluated = metrics[label].count > 0
+        table.append([
+            label,
+            path.stat().st_size / 2 ** 20,
+            profile_predictor(predictor, image) if predictor else None,
+            result["abs_rel"] if evaluated else None,
+            result["a1"] if evaluated else None])
+    print(tabulate(
+        table,
+        headers=["variant", "size [MB]", "latency [ms]", "abs_rel", "a1"]))
+
+
+def mlmodel_variants(path_to_pb, model):
+    """Saves the weight-quantized Core ML variants.
+    Args:
+        path_to_pb (pathlib.Path): The path to the frozen graph.
+        model (coremltools.models.MLModel): The float32 Core ML model.
+    Returns:
+        list: The label, path and predictor of every variant, predictors
+            are `None` where Core ML cannot run.
+    """
+    stem = path_to_pb.with_suffix("")
+    variants = []
+    for label, nbits in [("float32", None), ("float16", 16), ("int8", 8)]:
+        path = Path(str(path_to_pb).replace("pb", "mlmodel"))
+        quantized = model
+        if nbits is not None:
+            path = Path(f"{stem}_{label}.mlmodel")
+            quantized = quantize_mlmodel(model, nbits)
+            quantized.save(str(path))
+        predictor = None
+        if MLModelPredictor.available():
+            predictor = MLModelPredictor(quantized)
+        variants.append((f"mlmodel {label}", path, predictor))
+    return variants
+
+
+def tflite_variants(
+    path_to_pb,
+    output,
+    h,
+    w,
+    path_to_kitti,
+    path_to_split,
+    samples
+):
+    """Saves the post-training quantized TFLite variants.
+
+    The int8 variant is calibrated on KITTI, skipped without it.
+    Args:
+        path_to_pb (pathlib.Path): The path to the frozen graph.
+        output (str): The name of the output node.
+        h (int): The image height.
+        w (int): The image wodth.
+        path_to_kitti (str): The path to the KITTI dataset.
+        path_to_split (str): The path to the split index.
+        samples (int): The number of KITTI frames to calibrate int8 on.
+    Returns:
+        list: The label, path and predictor of every variant.
+    """
+    def representative():
+        for _, image in kitti_frames(
+                path_to_kitti, path_to_split, h, w, samples):
+            yield image
+
+    labels = ["float32", "float16"]
+    if path_to_kitti is not None:
+        labels.append("int8")
+    variants = []
+    for label in labels:
+        path = Path(f"{path_to_pb.with_suffix('')}_{label}.tflite")
+        content = convert_tflite(
+            path_to_pb,
+            "In",
+            output,
+            [1, h, w, 3],
+            label,
+            representative if label == "int8" else None)
+        path.write_bytes(content)
+        variants.append((f"tflite {label}", path, TFLitePredictor(content)))
+    return variants
+
+
+def score_variants(variants, h, w, path_to_kitti, path_to_split, frames):
+    """Scores the runnable variants on KITTI.
+    Args:
+        variants (list): The label, path and predictor of every variant.
+        h (int): The image height.
+        w (int): The image wodth.
+        path_to_kitti (str): The path to the KITTI dataset, nothing is
+            scored if not given.
+        path_to_split (str): The path to the split index.
+        frames (int): The number of KITTI frames to evaluate on.
+    Returns:
+        dict: The `DepthMetrics` of every variant label.
+    """
+    metrics = {label: DepthMetrics() for label, _, _ in variants}
+    if path_to_kitti is None:
+        return metrics
+    ground = SparseDepthReader(Path(path_to_split) / "depths")
+    count = min(frames, len(ground))
+    for i, image in kitti_frames(path_to_kitti, path_to_split, h, w, count):
+        for label, _, predictor in variants:
+            if predictor is not None:
+                dep = np.squeeze(predictor(image)).astype(np.float32)
+                metrics[label].add(score(metrics[label], dep, ground, i))
+    return metrics
+
+
+def kitti_frames(path_to_kitti, path_to_split, h, w, count):
+    """Yields KITTI frames with their split index.
+    Args:
+        path_to_kitti (str): The path to the KITTI dataset.
+        path_to_split (str): The path to the split index.
+        h (int): The image height.
+        w (int): The image wodth.
+        count (int): The number of frames.
+    Yields:
+        tuple: The split index and a [1, h, w, 3] frame in [0, 255], the
+            range the exported `In` input expects.
+    """
+    graph = tf.Graph()
+    with graph.as_default():
+        dataset = KITTI({
+            "h": h,
+            "w": w,
+            "path": Path(path_to_kitti),
+            "slice": Path(path_to_split) / "test_files.txt",
+        })
+    with tf.Session(graph=graph) as sess:
+        sess.run(dataset.initializer)
+        for i in range(count):
+            yield i, sess.run(dataset.batch) * 255.0
 
 
 def main():
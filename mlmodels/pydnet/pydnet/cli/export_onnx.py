@@ -0,0 +1,96 @@
+"""ONNX Exporter CLI.
+"""
+
+import sys
+import fire
+import cv2
+import onnx
+import numpy as np
+from traceback import format_exc
+from pathlib import Path
+from pydnet.models import freeze_pydnet
+from pydnet.models.graph_utils import graph_outputs, load_graph
+from pydnet.models.onnx_utils import ONNXPredictor, convert_onnx
+from pydnet.models.pydnet import architecture
+from pydnet.models.quantize_utils import FrozenGraphPredictor
+
+
+def export_onnx(
+    name,
+    h,
+    w,
+    path_to_checkpoint,
+    path_to_output,
+    path_to_images=None,
+    opset=11,
+    optimize=True,
+    tolerance=1e-2,
+    width=1.0,
+    levels=6,
+    estimator=None
+):
+    """Exports the PyDnet model into ONNX with a dynamic batch axis.
+    Args:
+        name(str): The name of the architecture.
+        h (int): The image height.
+        w (int): The image wodth.
+        path_to_checkpoint (str): The path to the checkpoint file.
+        path_to_output (str): The path to the output directory.
+        path_to_images (str): The directory of png images to check the
+            parity against TensorFlow on.
+        opset (int): The ONNX opset version.
+        optimize (bool): Optimizes the frozen graph before conversion.
+        tolerance (float): The maximum absolute difference allowed.
+        width (float): The encoder width multiplier of the checkpoint.
+        levels (int): The pyramid depth of the checkpoint.
+        estimator (list): The estimator channels of the checkpoint, the
+            published profile if not given.
+    """
+    path_to_pb = freeze_pydnet(
+        name,
+        int(h),
+        int(w),
+        Path(path_to_checkpoint),
+        Path(path_to_output),
+        batch=None,
+        optimize=bool(optimize),
+        architecture=architecture(width, levels, estimator))
+    graph_def = load_graph(path_to_pb)
+    output = graph_outputs(graph_def)[0]
+    model = convert_onnx(graph_def, ["In"], [output], int(opset))
+    onnx.save(model, str(path_to_pb.with_suffix(".onnx")))
+    if path_to_images is not None:
+        images = read_images(Path(path_to_images), int(h), int(w))
+        expected = FrozenGraphPredictor(path_to_pb, "In", output)(images)
+        actual = ONNXPredictor(model)(images)
+        error = float(np.abs(expected - actual).max())
+        print(f"Max absolute difference on {len(images)} images: {error}")
+        if error > float(tolerance):
+            raise AssertionError(
+                f"ONNX output differs from TensorFlow by {error}")
+
+
+def read_images(path, h, w):
+    """Reads png images into a single batch.
+    Args:
+        path (pathlib.Path): The path to the image directory.
+        h (int): The image height.
+        w (int): The image wodth.
+    Returns:
+        np.ndarray: A [n, h, w, 3] RGB batch in [0, 255].
+    """
+    images = []
+    for filename in sorted(path.glob("*.png")):
+        image = cv2.imread(str(filename))
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        images.append(cv2.resize(image, (w, h)))
+    return np.stack(images).astype(np.float32)
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(export_onnx)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
@@ -3,41 +3,101 @@
 
 import sys
 import fire
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from traceback import format_exc
 from pathlib import Path
 from tqdm import tqdm
-from pydnet.data import generate_depth_map
+from pydnet.data.kitti_utils import project_depth_maps, read_projection
+from pydnet.data.sparse_depth import SparseDepthWriter
 
 
-def generate_kitti_ground_truth(path_to_kitti, path_to_split):
+def generate_kitti_ground_truth(
+    path_to_kitti,
+    path_to_split,
+    workers=1,
+    chunksize=16
+):
     """Generates ground truth depth maps from KITTI-360 dataset.
     Args:
         path_to_kitti (str): The path to the KITTI dataset.
         path_to_split (str): The path to the split index.
+        workers (int): The number of worker processes.
+        chunksize (int): The maximum number of frames per task.
     """
     path_to_kitti = Path(path_to_kitti)
     path_to_split = Path(path_to_split)
-    ground = []
-    for line in tqdm(readlines(path_to_split / "test_files.txt")):
+    lines = readlines(path_to_split / "test_files.txt")
+    with SparseDepthWriter(path_to_split / "depths", len(lines)) as ground,\
+            tqdm(total=len(lines)) as progress:
+        if int(workers) > 1:
+            with ProcessPoolExecutor(max_workers=int(workers)) as executor:
+                futures = [
+                    executor.submit(project_task, *task)
+                    for task in make_tasks(path_to_kitti, lines, chunksize)]
+                for future in as_completed(futures):
+                    indices, depths = future.result()
+                    collect(ground, indices, depths)
+                    progress.update(len(indices))
+        else:
+            for task in make_tasks(path_to_kitti, lines, chunksize):
+                indices, depths = project_task(*task)
+                collect(ground, indices, depths)
+                progress.update(len(indices))
+
+
+def make_tasks(path_to_kitti, lines, chunksize):
+    """Groups frames by date and drive into projection tasks.
+    Args:
+        path_to_kitti (pathlib.Path): The path to the KITTI dataset.
+        lines (list): The split index lines.
+        chunksize (int): The maximum number of frames per task.
+    Returns:
+        list: (indices, P_vel2im, im_shape, velodynes) tuples.
+    """
+    projections = {}
+    drives = {}
+    for index, line in enumerate(lines):
         date, drive_id, image_id, _, frame_id = line.split("/")
-        frame_id = int(frame_id)
-        calibration = path_to_kitti / date
+        if date not in projections:
+            projections[date] = read_projection(path_to_kitti / date, 2)
         velodyne = path_to_kitti\
             / date\
             / drive_id\
             / "velodyne_points"\
             / "data"\
-            / "{:010d}.bin".format(frame_id)
-        ground.append(
-            generate_depth_map(
-                calibration,
-                velodyne,
-                2,
-                True).astype(np.float32))
-    np.savez_compressed(
-        path_to_split / "depths.npz",
-        data=np.array(ground, dtype=object))
+            / "{:010d}.bin".format(int(frame_id))
+        drives.setdefault((date, drive_id), []).append((index, velodyne))
+    tasks = []
+    for (date, _), frames in drives.items():
+        P_vel2im, im_shape = projections[date]
+        for i in range(0, len(frames), int(chunksize)):
+            indices, velodynes = zip(*frames[i:i + int(chunksize)])
+            tasks.append((indices, P_vel2im, im_shape, velodynes))
+    return tasks
+
+
+def project_task(indices, P_vel2im, im_shape, velodynes):
+    """Projects a single task, runs in a worker process.
+    Args:
+        indices (tuple): The split indices of the frames.
+        P_vel2im (np.ndarray): The velodyne->image projection matrix.
+        im_shape (np.ndarray): The image shape.
+        velodynes (tuple): The paths to the velodyne sweeps.
+    Returns:
+        tuple: The split indices and the depth maps.
+    """
+    return indices, project_depth_maps(P_vel2im, im_shape, velodynes, True)
+
+
+def collect(ground, indices, depths):
+    """Stores depth maps by their split indices.
+    Args:
+        ground (pydnet.data.SparseDepthWriter): The resulting depth maps.
+        indices (tuple): The split indices of the frames.
+        depths (np.ndarray): The depth maps.
+    """
+    for index, depth in zip(indices, depths):
+        ground.write(index, depth)
 
 
 def readlines(path):
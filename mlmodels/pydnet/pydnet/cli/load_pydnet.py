@@ -0,0 +1,135 @@
+"""PyDnet Depth Inference Load Generator CLI.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import cv2
+import fire
+import numpy as np
+from traceback import format_exc
+from pathlib import Path
+from tabulate import tabulate
+from pydnet.serving.server import read_message, write_message
+
+
+def load_pydnet(
+    path_to_image=None,
+    host="127.0.0.1",
+    port=8080,
+    concurrency=(1, 4, 16),
+    requests=200,
+    path_to_output=None
+):
+    """Drives a local PyDnet server with concurrent keep-alive clients.
+    Args:
+        path_to_image (str): The path to the image to send, random noise is
+            sent if not given.
+        host (str): The server address.
+        port (int): The server port.
+        concurrency (list): The numbers of concurrent clients to sweep.
+        requests (int): The number of requests per sweep.
+        path_to_output (str): The path to the output JSON file, if any.
+    """
+    if path_to_image is not None:
+        body = Path(path_to_image).read_bytes()
+    else:
+        noise = np.random.randint(0, 256, [320, 640, 3], np.uint8)
+        body = cv2.imencode(".png", noise)[1].tobytes()
+
+    results = []
+    for clients in concurrency:
+        before = asyncio.run(fetch_metrics(host, int(port)))
+        latencies, elapsed = asyncio.run(
+            run_clients(host, int(port), body, int(clients), int(requests)))
+        after = asyncio.run(fetch_metrics(host, int(port)))
+        latencies = np.array(latencies) * 1000.0
+        batch_sizes = {
+            int(k): v - before["batch_sizes"].get(k, 0)
+            for k, v in after["batch_sizes"].items()}
+        batches = sum(batch_sizes.values())
+        results.append({
+            "clients": int(clients),
+            "latency": {
+                "p50": float(np.percentile(latencies, 50)),
+                "p95": float(np.percentile(latencies, 95)),
+                "p99": float(np.percentile(latencies, 99)),
+            },
+            "throughput": len(latencies) / elapsed,
+            "mean_batch": sum(k * v for k, v in batch_sizes.items()) /
+            max(batches, 1),
+            "batch_sizes": {k: v for k, v in batch_sizes.items() if v},
+        })
+
+    if path_to_output is not None:
+        with open(Path(path_to_output), "w") as f:
+            json.dump(results, f, indent=2)
+    print(tabulate(
+        [[r["clients"], r["latency"]["p50"], r["latency"]["p95"],
+          r["latency"]["p99"], r["throughput"], r["mean_batch"]]
+         for r in results],
+        headers=["clients", "p50 [ms]", "p95 [ms]", "p99 [ms]",
+                 "requests/sec", "mean batch"]))
+
+
+async def run_clients(host, port, body, clients, requests):
+    """Sends `requests` requests split over `clients` connections.
+    Returns:
+        tuple: The per-request latencies and the elapsed seconds.
+    """
+    counts = [requests // clients + (i < requests % clients)
+              for i in range(clients)]
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*[
+        run_client(host, port, body, n) for n in counts if n > 0])
+    elapsed = time.perf_counter() - start
+    return [t for ts in latencies for t in ts], elapsed
+
+
+async def run_client(host, port, body, count):
+    """Sends `count` prediction requests over one keep-alive connection.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    latencies = []
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            write_message(
+                writer,
+                "POST /predict HTTP/1.1",
+                {"Host": host, "Content-Type": "application/octet-stream"},
+                body)
+            await writer.drain()
+            status, _, payload = await read_message(reader)
+            if not status.split(" ")[1].startswith("2"):
+                raise RuntimeError(f"{status}: {payload.decode()}")
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+    return latencies
+
+
+async def fetch_metrics(host, port):
+    """Fetches the server metrics.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        write_message(
+            writer,
+            "GET /metrics HTTP/1.1",
+            {"Host": host, "Connection": "close"})
+        await writer.drain()
+        _, _, payload = await read_message(reader)
+    finally:
+        writer.close()
+    return json.loads(payload)
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(load_pydnet)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
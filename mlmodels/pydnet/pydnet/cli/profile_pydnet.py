@@ -0,0 +1,200 @@
+"""PyDnet Per-Layer Profiler CLI.
+"""
+
+import sys
+import fire
+import numpy as np
+import tensorflow as tf
+from collections import defaultdict
+from traceback import format_exc
+from pathlib import Path
+from tabulate import tabulate
+from tensorflow.python.client import timeline
+from tensorflow.python.framework import ops
+from pydnet.models import Pydnet
+from pydnet.models.pydnet import architecture
+
+
+def profile_pydnet(
+    path_to_trace,
+    path_to_checkpoint=None,
+    h=320,
+    w=640,
+    batch=1,
+    steps=10,
+    warmup=3,
+    width=1.0,
+    levels=6,
+    estimator=None
+):
+    """Profiles PyDnet per variable scope and per pyramid level.
+    Args:
+        path_to_trace (str): The path to the output Chrome trace file.
+        path_to_checkpoint (str): The path to the checkpoint file, random
+            weights are used if not given.
+        h (int): The image height.
+        w (int): The image width.
+        batch (int): The batch size.
+        steps (int): The number of traced steps.
+        warmup (int): The number of untraced steps.
+        width (float): The encoder width multiplier of the checkpoint.
+        levels (int): The pyramid depth of the checkpoint.
+        estimator (list): The estimator channels of the checkpoint, the
+            published profile if not given.
+    """
+    h, w, batch = int(h), int(w), int(batch)
+    graph = tf.Graph()
+    with graph.as_default():
+        input = tf.placeholder(tf.float32, [batch, h, w, 3], name="In")
+        network = Pydnet({
+            "h": h,
+            "w": w,
+            "is_training": False,
+            **architecture(width, levels, estimator),
+        })
+        network.forward(input)
+        output = network.output_nodes[0]
+        saver = tf.train.Saver()
+        initializer = tf.global_variables_initializer()
+
+    image = np.random.uniform(0, 255, [batch, h, w, 3]).astype(np.float32)
+    options = tf.RunOptions(trace_level=tf.RunOptions.FULL_TRACE)
+    stats = defaultdict(lambda: np.zeros(3))
+    with tf.Session(graph=graph) as sess:
+        if path_to_checkpoint is not None:
+            saver.restore(sess, str(path_to_checkpoint))
+        else:
+            sess.run(initializer)
+        for _ in range(int(warmup)):
+            sess.run(output, {input: image})
+        for _ in range(int(steps)):
+            run_metadata = tf.RunMetadata()
+            sess.run(
+                output,
+                {input: image},
+                options=options,
+                run_metadata=run_metadata)
+            accumulate_step(stats, run_metadata.step_stats)
+
+    for stat in stats.values():
+        stat[0] /= int(steps)
+        stat[1] /= int(steps)
+    # Grappler fuses ops at run time, e.g. Conv2D into a `_FusedConv2D`
+    # named after its BiasAdd, so FLOPs are counted on the graph and only
+    # joined with the timings by group.
+    for op in graph.get_operations():
+        stats[op.name][2] = node_flops(graph, op.name)
+    with open(Path(path_to_trace), "w") as f:
+        f.write(timeline.Timeline(
+            run_metadata.step_stats).generate_chrome_trace_format())
+
+    for title, key in [
+        ("scope", scope_of),
+        ("level", level_of),
+        ("component", component_of)
+    ]:
+        print(tabulate(
+            aggregate(stats, key),
+            headers=[title, "time [ms]", "time [%]", "MFLOPs", "output [MB]"],
+            floatfmt=".3f"))
+        print()
+
+
+def accumulate_step(stats, step_stats):
+    """Adds the op time and output bytes of a traced step per node.
+    Args:
+        stats (dict): The (time, bytes, flops) of each node.
+        step_stats (tf.StepStats): The traced step.
+    """
+    for device in step_stats.dev_stats:
+        for node in device.node_stats:
+            name = node.node_name.split(":")[0]
+            if name.startswith("_"):
+                continue
+            stats[name][0] += \
+                (node.op_end_rel_micros - node.op_start_rel_micros) / 1000.0
+            stats[name][1] += sum(
+                output.tensor_description.allocation_description
+                .requested_bytes
+                for output in node.output)
+
+
+def node_flops(graph, name):
+    """Returns the FLOPs of a node, 0 if they are not registered.
+    Args:
+        graph (tf.Graph): The graph.
+        name (str): The name of the node.
+    """
+    try:
+        node_def = graph.get_operation_by_name(name).node_def
+        return ops.get_stats_for_node_def(graph, node_def, "flops").value or 0
+    except (KeyError, ValueError):
+        return 0
+
+
+def aggregate(stats, key):
+    """Aggregates node statistics into sorted table rows.
+    Args:
+        stats (dict): The (time, bytes, flops) of each node.
+        key (callable): Maps a node name to its group.
+    Returns:
+        list: The group, time, share of time, MFLOPs and output MB rows,
+            groups neither run nor counting FLOPs are left out.
+    """
+    groups = defaultdict(lambda: np.zeros(3))
+    for name, stat in stats.items():
+        groups[key(name)] += stat
+    total = sum(stat[0] for stat in groups.values()) or 1.0
+    rows = [
+        [group, stat[0], 100.0 * stat[0] / total, stat[2] / 1e6,
+         stat[1] / 2 ** 20]
+        for group, stat in groups.items() if stat.any()]
+    return sorted(rows, key=lambda row: -row[1])
+
+
+def scope_of(name):
+    """Returns the layer scope of a node, e.g. `decoder/L2/estimator`.
+    Args:
+        name (str): The name of the node.
+    """
+    parts = name.split("/")
+    if parts[0] == "encoder":
+        return "/".join(parts[:2])
+    if parts[0] == "decoder" and parts[1].startswith("L"):
+        return "/".join(parts[:3])
+    return "/".join(parts[:2]) if len(parts) > 1 else parts[0]
+
+
+def level_of(name):
+    """Returns the pyramid level of a node, e.g. `L2`.
+    Args:
+        name (str): The name of the node.
+    """
+    parts = name.split("/")
+    if parts[0] == "encoder" and parts[1].startswith("conv"):
+        return f"L{parts[1][4]}"
+    if parts[0] == "decoder" and parts[1].startswith("L"):
+        return parts[1]
+    return "-"
+
+
+def component_of(name):
+    """Returns the component of a node, e.g. `upsampler`.
+    Args:
+        name (str): The name of the node.
+    """
+    parts = name.split("/")
+    if parts[0] == "encoder":
+        return "encoder"
+    if parts[0] == "decoder" and parts[1].startswith("L"):
+        return parts[2]
+    return "other"
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(profile_pydnet)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
@@ -0,0 +1,135 @@
+"""PyDnet Depth Inference Server CLI.
+"""
+
+import sys
+import asyncio
+import fire
+import numpy as np
+import tensorflow as tf
+from traceback import format_exc
+from pathlib import Path
+from pydnet.models import Pydnet
+from pydnet.models.graph_utils import graph_outputs, load_graph
+from pydnet.models.pydnet import architecture
+from pydnet.models.quantize_utils import FrozenGraphPredictor
+from pydnet.serving import DepthServer, MicroBatcher
+
+
+def serve_pydnet(
+    path_to_checkpoint=None,
+    path_to_pb=None,
+    h=320,
+    w=640,
+    host="127.0.0.1",
+    port=8080,
+    max_batch=8,
+    max_latency=0.01,
+    width=1.0,
+    levels=6,
+    estimator=None
+):
+    """Serves PyDnet depth maps over HTTP with dynamic micro-batching.
+    Args:
+        path_to_checkpoint (str): The path to the checkpoint file, random
+            weights are used if neither this nor `path_to_pb` is given.
+        path_to_pb (str): The path to a frozen graph, whose resolution
+            takes precedence over `h` and `w`, and whose batch, unless
+            dynamic, over `max_batch`.
+        h (int): The image height.
+        w (int): The image width.
+        host (str): The address to bind.
+        port (int): The port to bind.
+        max_batch (int): The maximum number of requests per batch.
+        max_latency (float): The maximum seconds a request waits for its
+            batch to fill up.
+        width (float): The encoder width multiplier of the checkpoint.
+        levels (int): The pyramid depth of the checkpoint.
+        estimator (list): The estimator channels of the checkpoint, the
+            published profile if not given.
+    """
+    if path_to_pb is not None:
+        graph_def = load_graph(Path(path_to_pb))
+        shape = [
+            node.attr["shape"].shape.dim for node in graph_def.node
+            if node.name == "In"][0]
+        h, w = shape[1].size, shape[2].size
+        predict = FrozenGraphPredictor(
+            Path(path_to_pb), "In", graph_outputs(graph_def)[0])
+        if shape[0].size > 0:
+            # A graph frozen with a static batch runs exactly that batch.
+            max_batch = shape[0].size
+            if max_batch > 1:
+                predict = PaddedPredictor(predict, max_batch)
+    else:
+        predict = CheckpointPredictor(
+            path_to_checkpoint,
+            int(h),
+            int(w),
+            architecture(width, levels, estimator))
+    predict(np.zeros([1, h, w, 3], np.float32))
+
+    batcher = MicroBatcher(predict, int(max_batch), float(max_latency))
+    server = DepthServer(batcher, int(h), int(w))
+    print(f"Serving {h}x{w} on http://{host}:{port}", file=sys.stderr)
+    try:
+        asyncio.run(server.serve(host, int(port)))
+    except KeyboardInterrupt:
+        pass
+
+
+class CheckpointPredictor(object):
+    """Runs PyDnet restored from a checkpoint with a dynamic batch axis.
+    """
+
+    def __init__(self, path_to_checkpoint, h, w, architecture=None):
+        """Inits `CheckpointPredictor`, random weights if no checkpoint.
+
+        `architecture` holds the `Pydnet` params of the checkpoint.
+        """
+        graph = tf.Graph()
+        with graph.as_default():
+            self.input = tf.placeholder(tf.float32, [None, h, w, 3], name="In")
+            network = Pydnet({
+                "h": h,
+                "w": w,
+                "is_training": False,
+                **(architecture or {}),
+            })
+            network.forward(self.input)
+            self.output = network.output_nodes[0]
+            saver = tf.train.Saver()
+            initializer = tf.global_variables_initializer()
+        self.sess = tf.Session(graph=graph)
+        if path_to_checkpoint is not None:
+            saver.restore(self.sess, str(path_to_checkpoint))
+        else:
+            self.sess.run(initializer)
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        return self.sess.run(self.output, {self.input: image})
+
+
+class PaddedPredictor(object):
+    """Pads batches up to the static batch of a frozen graph.
+    """
+
+    def __init__(self, predict, batch):
+        """Inits `PaddedPredictor` with a predictor and its static batch.
+        """
+        self.predict = predict
+        self.batch = batch
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        # Padding repeats the last image, so that every sample of the
+        # padded batch normalizes as a real one.
+        padding = [(0, self.batch - len(image))] + [(0, 0)] * 3
+        return self.predict(np.pad(image, padding, "edge"))[:len(image)]
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(serve_pydnet)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
@@ -0,0 +1,146 @@
+"""PyDnet Streaming Inference CLI.
+"""
+
+import sys
+import json
+import time
+import fire
+import numpy as np
+import tensorflow as tf
+from traceback import format_exc
+from pathlib import Path
+from tabulate import tabulate
+from tqdm import tqdm
+from pydnet.data import AUTOTUNE, KITTI, SparseDepthReader
+from pydnet.eval import DepthMetrics
+from pydnet.eval.scoring import score
+from pydnet.models import Pydnet
+from pydnet.models.pydnet import architecture
+from pydnet.models.streaming import StreamingPredictor
+
+
+def stream_pydnet(
+    path_to_kitti,
+    path_to_split,
+    path_to_checkpoint,
+    h=320,
+    w=640,
+    refresh=(2, 4, 8),
+    threshold=None,
+    level=5,
+    frames=None,
+    max_depth=80.0,
+    path_to_output=None,
+    width=1.0,
+    levels=6,
+    estimator=None
+):
+    """Reports speedup and drift of streaming PyDnet over KITTI drives.
+    Args:
+        path_to_kitti (str): The path to the KITTI dataset.
+        path_to_split (str): The path to the split index.
+        path_to_checkpoint (str): The path to the checkpoint file.
+        h (int): The image height.
+        w (int): The image width.
+        refresh (list): The cache refresh intervals in frames to compare.
+        threshold (float): The relative frame difference forcing a
+            refresh, frame differences are not tested if not given.
+        level (int): The level whose upsampled estimate is reused, 5
+            skips conv5, conv6 and the L6 and L5 estimators.
+        frames (int): The number of frames, the whole split if not given.
+        max_depth (float): The maximum depth value.
+        path_to_output (str): The path to the output JSON file, if any.
+        width (float): The encoder width multiplier of the checkpoint.
+        levels (int): The pyramid depth of the checkpoint.
+        estimator (list): The estimator channels of the checkpoint, the
+            published profile if not given.
+    """
+    path_to_split = Path(path_to_split)
+    ground = SparseDepthReader(path_to_split / "depths")
+    dataset = KITTI({
+        "h": int(h),
+        "w": int(w),
+        "path": Path(path_to_kitti),
+        "slice": path_to_split / "test_files.txt",
+        "workers": AUTOTUNE,
+        "ordered": True,
+    })
+    input = tf.placeholder(tf.float32, [1, int(h), int(w), 3], name="In")
+    network = Pydnet({
+        "h": int(h),
+        "w": int(w),
+        "is_training": False,
+        **architecture(width, levels, estimator),
+    })
+    network.forward(input)
+    output = network.output_nodes[0]
+    if int(level) not in network.upsampled_nodes:
+        raise ValueError(f"No upsampled estimate at level {level}")
+    cache = network.upsampled_nodes[int(level)]
+
+    frames = len(ground) if frames is None else min(int(frames), len(ground))
+    drives = [name.split("/")[1] for name in dataset.slice]
+    with tf.Session() as sess:
+        sess.run(dataset.initializer)
+        tf.train.Saver().restore(sess, str(path_to_checkpoint))
+        predictors = [
+            StreamingPredictor(
+                sess,
+                input,
+                output,
+                cache,
+                int(k),
+                threshold)
+            for k in refresh]
+        metrics = [DepthMetrics(float(max_depth)) for _ in range(
+            len(predictors) + 1)]
+        elapsed = np.zeros(len(predictors) + 1)
+        drift = np.zeros(len(predictors))
+        for j in tqdm(range(frames)):
+            image = sess.run(dataset.batch) * 255.0
+            if j > 0 and drives[j] != drives[j - 1]:
+                for predictor in predictors:
+                    predictor.reset()
+            i = dataset.order[j]
+
+            start = time.perf_counter()
+            full = sess.run(output, {input: image})
+            elapsed[0] += time.perf_counter() - start
+            metrics[0].add(score(metrics[0], full, ground, i))
+            for n, predictor in enumerate(predictors, 1):
+                start = time.perf_counter()
+                dep = predictor(image)
+                elapsed[n] += time.perf_counter() - start
+                drift[n - 1] += np.abs(dep - full).mean() / full.mean()
+                metrics[n].add(score(metrics[n], dep, ground, i))
+
+    results = []
+    for n, k in enumerate((1,) + tuple(refresh)):
+        result = metrics[n].result()
+        results.append({
+            "refresh": int(k),
+            "threshold": threshold,
+            "refreshes": predictors[n - 1].refreshes / frames if n else 1.0,
+            "latency": elapsed[n] / frames * 1000.0,
+            "speedup": elapsed[0] / elapsed[n],
+            "drift": drift[n - 1] / frames if n else 0.0,
+            "abs_rel": result["abs_rel"],
+            "a1": result["a1"],
+        })
+    if path_to_output is not None:
+        with open(Path(path_to_output), "w") as f:
+            json.dump(results, f, indent=2)
+    print(tabulate(
+        [[r["refresh"], r["refreshes"], r["latency"], r["speedup"],
+          r["drift"], r["abs_rel"], r["a1"]] for r in results],
+        headers=["refresh", "refreshed", "ms/frame", "speedup", "drift",
+                 "abs_rel", "a1"]))
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(stream_pydnet)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
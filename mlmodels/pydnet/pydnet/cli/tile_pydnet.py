@@ -0,0 +1,88 @@
+"""PyDnet Tiled Inference CLI.
+"""
+
+import sys
+import cv2
+import fire
+import psutil
+import numpy as np
+import tensorflow as tf
+from traceback import format_exc
+from pathlib import Path
+from tabulate import tabulate
+from tqdm import tqdm
+from pydnet.models import Pydnet
+from pydnet.models.pydnet import architecture
+from pydnet.models.tiling import TiledPredictor
+
+
+def tile_pydnet(
+    path_to_images,
+    path_to_checkpoint,
+    path_to_output,
+    h=320,
+    w=640,
+    overlap=64,
+    budget=512,
+    width=1.0,
+    levels=6,
+    estimator=None
+):
+    """Predicts depth maps of images at their native resolution.
+    Args:
+        path_to_images (str): The path to the png image directory.
+        path_to_checkpoint (str): The path to the checkpoint file.
+        path_to_output (str): The path to the output directory.
+        h (int): The tile height, a multiple of 2 ** `levels`.
+        w (int): The tile width, a multiple of 2 ** `levels`.
+        overlap (int): The overlap between adjacent tiles in pixels.
+        budget (int): The activation memory budget in MB.
+        width (float): The encoder width multiplier of the checkpoint.
+        levels (int): The pyramid depth of the checkpoint.
+        estimator (list): The estimator channels of the checkpoint, the
+            published profile if not given.
+    """
+    input = tf.placeholder(tf.float32, [None, int(h), int(w), 3], name="In")
+    network = Pydnet({
+        "h": int(h),
+        "w": int(w),
+        "is_training": False,
+        **architecture(width, levels, estimator),
+    })
+    pred = tf.nn.relu(network.forward(input))
+    path_to_output = Path(path_to_output)
+    path_to_output.mkdir(parents=True, exist_ok=True)
+    process = psutil.Process()
+    rows = []
+    with tf.Session() as sess:
+        tf.train.Saver().restore(sess, str(path_to_checkpoint))
+        predictor = TiledPredictor(
+            sess,
+            input,
+            pred,
+            int(overlap),
+            int(budget) * 2 ** 20)
+        for filename in tqdm(sorted(Path(path_to_images).glob("*.png"))):
+            image = cv2.imread(str(filename))
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            dep = predictor(image.astype(np.float32))
+            cv2.imwrite(
+                str(path_to_output / filename.name),
+                cv2.applyColorMap(dep.astype(np.uint8), cv2.COLORMAP_MAGMA))
+            rows.append([
+                filename.name,
+                image.shape[0],
+                image.shape[1],
+                len(list(predictor.tiles(*image.shape[:2]))),
+                process.memory_info().rss / 2 ** 20])
+    print(f"{predictor.batch} tiles per batch", file=sys.stderr)
+    print(tabulate(rows, headers=["image", "h", "w", "tiles", "rss [MB]"]))
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(tile_pydnet)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
@@ -0,0 +1,162 @@
+"""PyDnet Stereo Training CLI.
+"""
+
+import sys
+import time
+import fire
+import tensorflow as tf
+from traceback import format_exc
+from pathlib import Path
+from pydnet.data import AUTOTUNE, KITTI
+from pydnet.models import Pydnet
+from pydnet.models.losses import stereo_loss
+from pydnet.models.pydnet import architecture
+from pydnet.models.pydnet_utils import report_complexity
+
+
+def train_pydnet(
+    path_to_kitti,
+    path_to_split,
+    path_to_output,
+    path_to_checkpoint=None,
+    split="train_files.txt",
+    h=256,
+    w=512,
+    batch_size=8,
+    steps=100000,
+    learning_rate=1e-4,
+    smoothness=0.1,
+    width=1.0,
+    levels=6,
+    estimator=None,
+    towers=1,
+    intra_op_threads=0,
+    shuffle=2048,
+    log_every=50,
+    save_every=5000
+):
+    """Trains PyDnet self-supervised on KITTI stereo pairs.
+    Args:
+        path_to_kitti (str): The path to the KITTI dataset.
+        path_to_split (str): The path to the split index.
+        path_to_output (str): The path to the checkpoint directory, the
+            checkpoints can be passed to `freeze_pydnet` as they are.
+        path_to_checkpoint (str): The path to a checkpoint to fine-tune,
+            random weights are used if not given.
+        split (str): The split file listing the left (image_02) frames.
+        h (int): The image height.
+        w (int): The image width.
+        batch_size (int): The global batch size, split over the towers.
+        steps (int): The number of training steps.
+        learning_rate (float): The Adam learning rate.
+        smoothness (float): The weight of the smoothness term.
+        width (float): The encoder width multiplier.
+        levels (int): The pyramid depth, from 3 to 6.
+        estimator (list): The estimator channels, the published profile if
+            not given.
+        towers (int): The number of data-parallel CPU towers.
+        intra_op_threads (int): The intra-op threads, 0 for default.
+        shuffle (int): The shuffle buffer size.
+        log_every (int): The number of steps between two log lines.
+        save_every (int): The number of steps between two checkpoints.
+    """
+    h, w, towers = int(h), int(w), int(towers)
+    if int(batch_size) % towers:
+        raise ValueError(f"Batch {batch_size} does not split over {towers}")
+    dataset = KITTI({
+        "h": h,
+        "w": w,
+        "path": Path(path_to_kitti),
+        "slice": Path(path_to_split) / split,
+        "batch_size": int(batch_size),
+        "workers": AUTOTUNE,
+        "deterministic": False,
+        "stereo": True,
+        "augment": True,
+        "shuffle": int(shuffle),
+        "drop_remainder": True,
+    })
+    step = tf.train.get_or_create_global_step()
+    optimizer = tf.train.AdamOptimizer(float(learning_rate))
+    lefts = tf.split(dataset.batch[0], towers)
+    rights = tf.split(dataset.batch[1], towers)
+    losses, grads = [], []
+    for i in range(towers):
+        # Towers share the variables, named as in inference graphs.
+        with tf.device(f"/cpu:{i}"), tf.name_scope(f"tower_{i}"),\
+                tf.variable_scope(tf.get_variable_scope(), reuse=i > 0):
+            network = Pydnet({
+                "h": h,
+                "w": w,
+                "is_training": True,
+                **architecture(width, levels, estimator),
+            })
+            preds = network.forward(lefts[i] * 255.0)
+            loss, _ = stereo_loss(
+                preds,
+                lefts[i],
+                rights[i],
+                float(smoothness))
+            losses.append(loss)
+            grads.append(optimizer.compute_gradients(loss))
+    report_complexity(network)
+    with tf.device("/cpu:0"):
+        loss = tf.add_n(losses) / towers
+        train = optimizer.apply_gradients(average_gradients(grads), step)
+
+    path_to_output = Path(path_to_output)
+    path_to_output.mkdir(parents=True, exist_ok=True)
+    saver = tf.train.Saver(max_to_keep=5)
+    config = tf.ConfigProto(
+        device_count={"CPU": towers},
+        intra_op_parallelism_threads=int(intra_op_threads),
+        inter_op_parallelism_threads=towers,
+        allow_soft_placement=True)
+    with tf.Session(config=config) as sess:
+        sess.run(tf.global_variables_initializer())
+        if path_to_checkpoint is not None:
+            tf.train.Saver(tf.trainable_variables()).restore(
+                sess, str(path_to_checkpoint))
+        # Training slower than the standalone loader is input-bound.
+        print(
+            f"Input pipeline: {dataset.throughput(sess, 20, 5):.1f} "
+            f"examples/sec standalone",
+            file=sys.stderr)
+        sess.run(dataset.initializer)
+        start, last = time.perf_counter(), 0
+        for i in range(1, int(steps) + 1):
+            _, value = sess.run([train, loss])
+            if i % int(log_every) == 0 or i == int(steps):
+                elapsed = time.perf_counter() - start
+                print(
+                    f"step {i}: loss {value:.4f}, "
+                    f"{(i - last) * int(batch_size) / elapsed:.1f} "
+                    f"examples/sec",
+                    file=sys.stderr)
+                start, last = time.perf_counter(), i
+            if i % int(save_every) == 0 or i == int(steps):
+                saver.save(sess, str(path_to_output / "pydnet"), step)
+
+
+def average_gradients(tower_grads):
+    """Averages the gradients of every variable over the towers.
+    Args:
+        tower_grads (list): The (gradient, variable) lists of the towers.
+    Returns:
+        list: The averaged (gradient, variable) pairs.
+    """
+    averaged = []
+    for pairs in zip(*tower_grads):
+        grads = [g for g, _ in pairs if g is not None]
+        if grads:
+            averaged.append((tf.add_n(grads) / len(grads), pairs[0][1]))
+    return averaged
+
+
+def main():
+    """A CLI entry point.
+    """
+    try:
+        fire.Fire(train_pydnet)
+    except Exception:
+        print(format_exc(), file=sys.stderr)
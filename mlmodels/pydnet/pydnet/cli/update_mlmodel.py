@@ -8,7 +8,15 @@ import coremltools.proto.FeatureTypes_pb2 as ft
 from traceback import format_exc
 from pathlib import Path
 
-def update_mlmodel(name, h, w, path_to_mlmodel, path_to_output):
+def update_mlmodel(
+    name,
+    h,
+    w,
+    path_to_mlmodel,
+    path_to_output,
+    exit_level=1,
+    resize=True
+):
     """Updates the PyDnet model.
     Args:
         name(str): The name of the architecture.
@@ -16,8 +24,29 @@ def update_mlmodel(name, h, w, path_to_mlmodel, path_to_output):
         w (int): The image wodth.
         path_to_mlmodel (str): The path to the mlmodel file.
         path_to_output (str): The path to the output directory.
+        exit_level (int): The pyramid level the decoder stops at.
+        resize (bool): Whether the output was resized to the image size.
     """
     spec = ct.utils.load_spec(path_to_mlmodel)
+    updated = update_spec(spec, name, h, w, exit_level, resize)
+    updated.save(path_to_output)
+
+
+def update_spec(spec, name, h, w, exit_level=1, resize=True):
+    """Sets the image I/O types and metadata of a PyDnet model spec.
+    Args:
+        spec (coremltools.proto.Model_pb2.Model): The model spec.
+        name(str): The name of the architecture.
+        h (int): The image height.
+        w (int): The image wodth.
+        exit_level (int): The pyramid level the decoder stops at.
+        resize (bool): Whether the output was resized to the image size.
+    Returns:
+        coremltools.models.MLModel: The updated model.
+    """
+    out_h, out_w = int(h), int(w)
+    if not resize:
+        out_h, out_w = out_h >> int(exit_level), out_w >> int(exit_level)
     for input in spec.description.input:
         input.type.imageType.colorSpace = ft.ImageFeatureType.RGB
         input.type.imageType.width  = int(w)
@@ -27,13 +56,13 @@ def update_mlmodel(name, h, w, path_to_mlmodel, path_to_output):
         output.type.imageType.colorSpace = ft.ImageFeatureType.ColorSpace.Value(
             "GRAYSCALE"
         )
-        output.type.imageType.width  = int(w)
-        output.type.imageType.height = int(h)
+        output.type.imageType.width  = out_w
+        output.type.imageType.height = out_h
     updated = ct.models.MLModel(spec)
     updated.author  = "Shingo OKAWA, Filippo Aleotti"
     updated.license = "Apache v2"
     updated.short_description = name
-    updated.save(path_to_output)
+    return updated
 
 
 def main():
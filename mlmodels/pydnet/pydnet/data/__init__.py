@@ -1,11 +1,32 @@
 """Data Module.
+
+`KITTI` is imported on first access only, the ground truth tooling does
+not need TensorFlow.
 """
 
-from .kitti import KITTI
-from .kitti_utils import generate_depth_map
+from pydnet._lazy import lazy
+
+
+_SUBMODULES = {
+    "AUTOTUNE": ".kitti",
+    "KITTI": ".kitti",
+    "FrameCache": ".frame_cache",
+    "generate_depth_map": ".kitti_utils",
+    "generate_depth_maps": ".kitti_utils",
+    "SparseDepthReader": ".sparse_depth",
+    "SparseDepthWriter": ".sparse_depth",
+}
 
 
 __all__ = [
+    "AUTOTUNE",
     "KITTI",
-    "generate_depth_map"
+    "FrameCache",
+    "generate_depth_map",
+    "generate_depth_maps",
+    "SparseDepthReader",
+    "SparseDepthWriter"
 ]
+
+
+__getattr__, __dir__ = lazy(__name__, _SUBMODULES)
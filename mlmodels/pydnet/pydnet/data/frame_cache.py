@@ -0,0 +1,119 @@
+"""Preprocessed Frame Cache Module.
+"""
+
+import os
+import time
+import hashlib
+import numpy as np
+from pathlib import Path
+from typing import Callable, Optional, Sequence, Union
+
+
+class FrameCache(object):
+    """Persistent cache of preprocessed uint8 frames.
+
+    Each entry is a memory mapped `.npy` tensor named after a key derived
+    from everything that determines its contents. An entry is invalidated
+    once any of its source files is newer than it, and the least recently
+    used entries are evicted to keep the directory within `budget` bytes.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        budget: Optional[int] = None
+    ):
+        """Inits `FrameCache` with `path` and an optional size `budget`.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.budget = budget
+
+    def key(self, *parts) -> str:
+        """Returns the key of an entry made of `parts`.
+        """
+        digest = hashlib.sha1()
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                part = part.tobytes()
+            elif not isinstance(part, bytes):
+                part = repr(part).encode("utf-8")
+            digest.update(part)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def load(
+        self,
+        key: str,
+        sources: Sequence[Union[str, Path]] = ()
+    ) -> Optional[np.ndarray]:
+        """Returns a read-only view of an entry or `None` if it is missing.
+        """
+        entry = self.path / f"{key}.npy"
+        if not entry.exists():
+            return None
+        mtime = entry.stat().st_mtime
+        if any(os.stat(source).st_mtime > mtime for source in sources):
+            entry.unlink()
+            return None
+        os.utime(entry, (time.time(), mtime))
+        return np.load(entry, mmap_mode="r")
+
+    def store(
+        self,
+        key: str,
+        shape: Sequence[int],
+        fill: Callable[[np.ndarray], None]
+    ) -> Optional[np.ndarray]:
+        """Creates an entry of `shape` filled by `fill` and returns a view.
+
+        Returns `None` without calling `fill` if the entry exceeds budget.
+        The budget accounts for the whole file, `.npy` header included.
+        """
+        if self.budget is not None and np.prod(shape) > self.budget:
+            return None
+        entry = self.path / f"{key}.npy"
+        partial = self.path / f"{key}.partial.npy"
+        frames = np.lib.format.open_memmap(
+            partial,
+            mode="w+",
+            dtype=np.uint8,
+            shape=tuple(shape))
+        if self.budget is not None:
+            size = os.path.getsize(partial)
+            if size > self.budget:
+                del frames
+                os.remove(partial)
+                return None
+            self.evict(self.budget - size)
+        fill(frames)
+        frames.flush()
+        del frames
+        os.replace(partial, entry)
+        return np.load(entry, mmap_mode="r")
+
+    def evict(self, budget: int) -> None:
+        """Removes the least recently used entries until within `budget`.
+
+        In-flight `.partial.npy` files, possibly written by another
+        process, are neither counted nor removed.
+        """
+        entries = []
+        for entry in self.path.glob("*.npy"):
+            if entry.name.endswith(".partial.npy"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, os.path.getsize(entry), entry))
+        entries.sort(key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= budget:
+                break
+            total -= size
+            try:
+                entry.unlink()
+            except FileNotFoundError:
+                pass
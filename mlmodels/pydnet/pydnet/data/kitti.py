@@ -1,8 +1,13 @@
 """Heap Module.
 """
 
+import time
 import tensorflow as tf
 import numpy as np
+from .frame_cache import FrameCache
+
+
+AUTOTUNE = tf.data.experimental.AUTOTUNE
 
 
 class KITTI(object):
@@ -11,50 +16,227 @@ class KITTI(object):
 
     def __init__(self, params: dict):
         """Inits `KITTI` with `params`.
+
+        Besides `h`, `w`, `path` and `slice`, `params` may set
+        `batch_size`, `workers` (an int or `AUTOTUNE`), `prefetch` (a
+        buffer size, `AUTOTUNE` or 0 to disable), `deterministic` and
+        `interleave` (the number of files read concurrently, 0 to read
+        them in the decode stage). Setting `cache` to a directory keeps
+        the resized frames as uint8 in a `FrameCache`, bounded by
+        `cache_budget` bytes, so later runs skip decoding. Setting
+        `ordered` reads the frames in drive and frame order, `order` maps
+        them back to their index in the slice. Setting `stereo` yields
+        (left, right) batches of the image_02 and image_03 cameras, for
+        training along with `augment`, `shuffle` (a buffer size) and
+        `drop_remainder`. Frames are in [0, 1], `Pydnet` expects them
+        scaled to [0, 255].
         """
-        self.workers = 4
         self.h = params["h"]
         self.w = params["w"]
         self.path = params["path"]
         self.slice = np.loadtxt(params["slice"], dtype=bytes).astype(np.str)
+        self.order = np.arange(len(self.slice))
+        if params.get("ordered", False):
+            self.order = np.argsort(self.slice, kind="stable")
+            self.slice = self.slice[self.order]
+        self.batch_size = params.get("batch_size", 1)
+        self.workers = params.get("workers", 4)
+        self.prefetch = params.get("prefetch", AUTOTUNE)
+        self.deterministic = params.get("deterministic", True)
+        self.interleave = params.get("interleave", 0)
+        self.resize_method = params.get(
+            "resize_method",
+            tf.image.ResizeMethod.AREA)
+        self.stereo = params.get("stereo", False)
+        self.augment = params.get("augment", False)
+        self.shuffle = params.get("shuffle", 0)
+        self.drop_remainder = params.get("drop_remainder", False)
+        self.cache = None
+        if params.get("cache") is not None and not self.stereo:
+            self.cache = FrameCache(
+                params["cache"],
+                params.get("cache_budget"))
         self._build()
 
     def _build(self) -> None:
         """Builds KITTI dataset from a given `params`.
         """
-        dataset = tf.data.Dataset.from_tensor_slices(
-            tf.convert_to_tensor(self.slice, dtype=tf.string))
-        dataset = dataset.map(
-            self._reshape,
-            num_parallel_calls=self.workers)
-        dataset = dataset.batch(1)
+        prefix = str(self.path.resolve()) + "/"
+        filenames = np.char.add(np.char.add(prefix, self.slice), ".png")
+        frames = self._cached(filenames) if self.cache else None
+        if self.stereo:
+            dataset = self._paired(filenames)
+        elif frames is not None:
+            dataset = tf.data.Dataset.range(len(frames))
+            dataset = dataset.map(
+                lambda index: self._fetch(frames, index),
+                num_parallel_calls=self.workers)
+        else:
+            dataset = self._decoded(filenames)
+        dataset = dataset.batch(self.batch_size, self.drop_remainder)
         dataset = dataset.repeat()
+        if self.prefetch:
+            dataset = dataset.prefetch(self.prefetch)
+        options = tf.data.Options()
+        options.experimental_deterministic = self.deterministic
+        dataset = dataset.with_options(options)
         iterator = tf.data.make_initializable_iterator(dataset)
         self.initializer = iterator.initializer
         self.batch = iterator.get_next()
 
+    def _decoded(self, filenames: np.ndarray) -> tf.data.Dataset:
+        """Builds the dataset decoding png files.
+        """
+        dataset = tf.data.Dataset.from_tensor_slices(
+            tf.convert_to_tensor(filenames, dtype=tf.string))
+        if self.interleave:
+            dataset = dataset.interleave(
+                lambda f: tf.data.Dataset.from_tensors(tf.io.read_file(f)),
+                cycle_length=self.interleave,
+                num_parallel_calls=self.interleave)
+            dataset = dataset.map(
+                self._preprocess,
+                num_parallel_calls=self.workers)
+        else:
+            dataset = dataset.map(
+                self._reshape,
+                num_parallel_calls=self.workers)
+        return dataset
+
+    def _paired(self, filenames: np.ndarray) -> tf.data.Dataset:
+        """Builds the dataset decoding stereo pairs of png files.
+        """
+        dataset = tf.data.Dataset.from_tensor_slices((
+            filenames,
+            np.char.replace(filenames, "image_02", "image_03")))
+        if self.shuffle:
+            dataset = dataset.shuffle(self.shuffle)
+        return dataset.map(self._pair, num_parallel_calls=self.workers)
+
+    def _pair(self, left: str, right: str) -> tuple:
+        """Prepares single stereo pair.
+        """
+        left, right = self._reshape(left), self._reshape(right)
+        if self.augment:
+            left, right = self._augment(left, right)
+        return left, right
+
+    def _augment(self, left: tf.Tensor, right: tf.Tensor) -> tuple:
+        """Randomly mirrors a stereo pair and shifts its colors.
+
+        Mirroring swaps the cameras, so the left disparity stays positive.
+        """
+        flip = tf.random.uniform([]) > 0.5
+        flipped = (
+            tf.image.flip_left_right(right),
+            tf.image.flip_left_right(left))
+        left, right = tf.cond(flip, lambda: flipped, lambda: (left, right))
+        gamma = tf.random.uniform([], 0.8, 1.2)
+        brightness = tf.random.uniform([], 0.5, 2.0)
+        colors = tf.random.uniform([3], 0.8, 1.2)
+        shift = tf.random.uniform([]) > 0.5
+
+        def recolor(image):
+            shifted = image ** gamma * brightness * colors
+            return tf.cond(
+                shift,
+                lambda: tf.clip_by_value(shifted, 0.0, 1.0),
+                lambda: image)
+
+        return recolor(left), recolor(right)
+
+    def _cached(self, filenames: np.ndarray) -> np.ndarray:
+        """Returns the cached frames, decoding them on a cache miss.
+
+        Returns `None` if the frames do not fit in the cache budget.
+        """
+        key = self.cache.key(
+            filenames,
+            self.h,
+            self.w,
+            str(self.resize_method))
+        frames = self.cache.load(key, filenames)
+        if frames is None:
+            frames = self.cache.store(
+                key,
+                (len(filenames), self.h, self.w, 3),
+                lambda out: self._fill(filenames, out))
+        return frames
+
+    def _fill(self, filenames: np.ndarray, out: np.ndarray) -> None:
+        """Decodes and resizes all the png files into `out`.
+        """
+        with tf.Graph().as_default():
+            dataset = tf.data.Dataset.from_tensor_slices(filenames)
+            dataset = dataset.map(
+                lambda f: tf.saturate_cast(
+                    tf.round(self._resize(self._imread(f))),
+                    tf.uint8),
+                num_parallel_calls=self.workers)
+            dataset = dataset.prefetch(AUTOTUNE)
+            frame = tf.data.make_one_shot_iterator(dataset).get_next()
+            with tf.Session() as sess:
+                for i in range(len(filenames)):
+                    out[i] = sess.run(frame)
+
+    def _fetch(self, frames: np.ndarray, index: tf.Tensor) -> tf.Tensor:
+        """Reads single cached image.
+        """
+        image = tf.numpy_function(
+            lambda i: frames[i],
+            [index],
+            tf.uint8)
+        image.set_shape([self.h, self.w, 3])
+        image = tf.cast(image, tf.float32)
+        image = image / 255.0
+        return image
+
     def _imread(self, filename: str) -> np.ndarray:
         """Read png file from file system.
         """
-        image = tf.image.decode_png(
-            tf.io.read_file(
-                tf.strings.join([
-                    str(self.path.resolve()),
-                    "/",
-                    filename,
-                    ".png"])),
-            channels=3)
+        return self._decode(tf.io.read_file(filename))
+
+    def _decode(self, content: str) -> np.ndarray:
+        """Decodes png file contents.
+        """
+        image = tf.image.decode_png(content, channels=3)
         image = tf.cast(image, tf.float32)
         return image
 
     def _reshape(self, filename: str) -> np.ndarray:
         """Prepare single image at testing time.
         """
-        image = self._imread(filename)
+        return self._resize(self._imread(filename)) / 255.0
+
+    def _preprocess(self, content: str) -> np.ndarray:
+        """Prepare single image from png file contents at testing time.
+        """
+        return self._resize(self._decode(content)) / 255.0
+
+    def _resize(self, image: tf.Tensor) -> np.ndarray:
+        """Resizes single image to the network input size.
+        """
         image = tf.image.resize_images(
             image,
             [self.h, self.w],
-            tf.image.ResizeMethod.AREA)
+            self.resize_method)
         image.set_shape([self.h, self.w, 3])
-        image = image / 255.0
         return image
+
+    def throughput(
+        self,
+        sess: tf.Session,
+        steps: int = 100,
+        warmup: int = 10
+    ) -> float:
+        """Measures the standalone loader throughput in images/sec.
+        """
+        sess.run(self.initializer)
+        for _ in range(warmup):
+            sess.run(self.batch)
+        images = 0
+        start = time.perf_counter()
+        for _ in range(steps):
+            batch = sess.run(self.batch)
+            images += len(batch[0] if self.stereo else batch)
+        return images / (time.perf_counter() - start)
@@ -3,16 +3,15 @@
 
 import numpy as np
 from pathlib import Path
-from collections import Counter
-from typing import Union, Sequence
+from typing import Optional, Sequence, Tuple, Union
 
 
 def read_velodyne_points(path: Union[str, Path]) -> np.ndarray:
-    """Reads 3D point cloud from KITTI file format.
+    """Memory maps 3D point cloud from KITTI file format.
+
+    Returns a read-only view whose rows are forward, left, up, reflectance.
     """
-    points = np.fromfile(path, dtype=np.float32).reshape(-1, 4)
-    points[:, 3] = 1.0
-    return points
+    return np.memmap(path, dtype=np.float32, mode="r").reshape(-1, 4)
 
 
 def read_calibration(path: Union[str, Path]) -> object:
@@ -33,20 +32,11 @@ def read_calibration(path: Union[str, Path]) -> object:
     return calibration
 
 
-def sub2ind(shape: Sequence, row: int, col: int) -> int:
-    """Converts row, col matrix subscripts to linear indices.
-    """
-    m, n = shape
-    return row * (n - 1) + col - 1
-
-
-def generate_depth_map(
+def read_projection(
     calibration: Path,
-    velodyne: Path,
-    cam: int = 2,
-    vel_depth: bool = False
-) -> np.ndarray:
-    """Generates a depth map from velodyne data.
+    cam: int = 2
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Reads the velodyne->image projection matrix and the image shape.
     """
     # Read calibration files.
     cam2cam = read_calibration(calibration / "calib_cam_to_cam.txt")
@@ -65,10 +55,75 @@ def generate_depth_map(
     P_rect = cam2cam['P_rect_0'+str(cam)].reshape(3, 4)
     P_vel2im = np.dot(np.dot(P_rect, R_cam2rect), vel2cam)
 
-    # Load velodyne points and remove all behind image plane (approximation).
+    return P_vel2im, im_shape
+
+
+def sub2ind(shape: Sequence, row: int, col: int) -> int:
+    """Converts row, col matrix subscripts to linear indices.
+    """
+    m, n = shape
+    return row * (n - 1) + col - 1
+
+
+def frustum_planes(
+    P_vel2im: np.ndarray,
+    im_shape: Sequence,
+    margin: float = 1.0
+) -> np.ndarray:
+    """Returns the left and right image frustum planes in velodyne space.
+
+    The planes are widened by `margin` pixels, so culling with them never
+    drops a point that projects in bounds.
+    """
+    u_min = 0.5 - margin
+    u_max = im_shape[1] + 0.5 + margin
+    return np.stack([
+        P_vel2im[0] - u_min * P_vel2im[2],
+        u_max * P_vel2im[2] - P_vel2im[0]])
+
+
+def cull_velodyne_points(
+    velo: np.ndarray,
+    P_vel2im: np.ndarray,
+    im_shape: Sequence,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Culls points outside the image frustum.
+
+    Returns the remaining points in homogeneous coordinates, written into
+    `out` if given, which must hold at least `len(velo)` rows.
+    """
+    # Remove all points behind image plane (approximation).
     # Each row of the velodyne data is forward, left, up, reflectance.
-    velo = read_velodyne_points(velodyne)
-    velo = velo[velo[:, 0] >= 0, :]
+    inds = np.flatnonzero(velo[:, 0] >= 0)
+
+    # A point projects in bounds only if it lies on the same side of both
+    # planes. The velodyne sweeps 360 degrees horizontally but barely
+    # exceeds the camera vertically, so only the side planes are tested.
+    planes = frustum_planes(P_vel2im, im_shape)
+    side = np.dot(velo[inds, :3], planes[:, :3].T) + planes[:, 3]
+    inds = inds[side[:, 0] * side[:, 1] >= 0]
+
+    if out is None:
+        out = np.empty((len(inds), 4), dtype=np.float32)
+    out = out[:len(inds)]
+    np.take(velo, inds, axis=0, out=out)
+    out[:, 3] = 1.0
+    return out
+
+
+def project_velodyne_points(
+    velo: np.ndarray,
+    P_vel2im: np.ndarray,
+    im_shape: Sequence,
+    vel_depth: bool = False,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Projects velodyne points onto the image plane.
+
+    Returns the in-bounds points as rows of (col, row, depth).
+    """
+    velo = cull_velodyne_points(velo, P_vel2im, im_shape, out)
 
     # Project the points to the camera.
     velo_pts_im = np.dot(P_vel2im, velo.T).T
@@ -86,23 +141,88 @@ def generate_depth_map(
         val_inds\
         & (velo_pts_im[:, 0] < im_shape[1])\
         & (velo_pts_im[:, 1] < im_shape[0])
-    velo_pts_im = velo_pts_im[val_inds, :]
+    return velo_pts_im[val_inds, :]
+
+
+def rasterize_depth(
+    velo_pts_im: np.ndarray,
+    im_shape: Sequence,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Rasterizes projected points into a depth map, the closest depth wins.
+    """
+    if out is None:
+        out = np.zeros(tuple(im_shape[:2]), dtype=np.float32)
+    else:
+        out[...] = 0
+    if not len(velo_pts_im):
+        return out
 
     # Project to image.
-    depth = np.zeros((im_shape[:2]))
-    depth[
-        velo_pts_im[:, 1].astype(np.int),
-        velo_pts_im[:, 0].astype(np.int)
-    ] = velo_pts_im[:, 2]
-
-    # Find the duplicate points and choose the closest depth.
-    inds = sub2ind(depth.shape, velo_pts_im[:, 1], velo_pts_im[:, 0])
-    dupe_inds = [item for item, count in Counter(inds).items() if count > 1]
-    for dd in dupe_inds:
-        pts = np.where(inds == dd)[0]
-        x_loc = int(velo_pts_im[pts[0], 0])
-        y_loc = int(velo_pts_im[pts[0], 1])
-        depth[y_loc, x_loc] = velo_pts_im[pts, 2].min()
-    depth[depth < 0] = 0
-
-    return depth
+    rows = velo_pts_im[:, 1].astype(np.int64)
+    cols = velo_pts_im[:, 0].astype(np.int64)
+    depths = velo_pts_im[:, 2]
+    out[rows, cols] = depths
+
+    # Resolve duplicate points in a single sort/reduce pass. Points are
+    # grouped by the same linear index as the KITTI devkit port, so the
+    # output stays identical to the reference implementation.
+    inds = sub2ind(out.shape, rows, cols)
+    order = np.argsort(inds, kind="stable")
+    inds = inds[order]
+    starts = np.flatnonzero(np.r_[True, inds[1:] != inds[:-1]])
+    closest = np.minimum.reduceat(depths[order], starts)
+    first = order[starts]
+    out[rows[first], cols[first]] = closest
+    out[out < 0] = 0
+
+    return out
+
+
+def project_depth_maps(
+    P_vel2im: np.ndarray,
+    im_shape: Sequence,
+    velodynes: Sequence[Path],
+    vel_depth: bool = False
+) -> np.ndarray:
+    """Projects a batch of velodyne sweeps with a precomputed projection.
+    """
+    depths = np.zeros(
+        (len(velodynes), im_shape[0], im_shape[1]),
+        dtype=np.float32)
+    buffer = np.empty((0, 4), dtype=np.float32)
+    for depth, velodyne in zip(depths, velodynes):
+        velo = read_velodyne_points(velodyne)
+        if len(buffer) < len(velo):
+            buffer = np.empty((len(velo), 4), dtype=np.float32)
+        velo_pts_im = project_velodyne_points(
+            velo,
+            P_vel2im,
+            im_shape,
+            vel_depth,
+            buffer)
+        rasterize_depth(velo_pts_im, im_shape, depth)
+    return depths
+
+
+def generate_depth_maps(
+    calibration: Path,
+    velodynes: Sequence[Path],
+    cam: int = 2,
+    vel_depth: bool = False
+) -> np.ndarray:
+    """Generates a batch of depth maps from velodyne data sharing calibration.
+    """
+    P_vel2im, im_shape = read_projection(calibration, cam)
+    return project_depth_maps(P_vel2im, im_shape, velodynes, vel_depth)
+
+
+def generate_depth_map(
+    calibration: Path,
+    velodyne: Path,
+    cam: int = 2,
+    vel_depth: bool = False
+) -> np.ndarray:
+    """Generates a depth map from velodyne data.
+    """
+    return generate_depth_maps(calibration, [velodyne], cam, vel_depth)[0]
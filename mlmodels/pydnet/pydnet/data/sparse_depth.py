@@ -0,0 +1,118 @@
+"""Sparse Depth Store Module.
+"""
+
+import os
+import numpy as np
+from pathlib import Path
+from typing import Union
+
+
+POINT = np.dtype([("row", "<u2"), ("col", "<u2"), ("depth", "<f4")])
+
+
+class SparseDepthWriter(object):
+    """Incremental writer of sparse per-frame depth maps.
+
+    The store is a directory holding `points.bin`, the (row, col, depth)
+    triplets of every frame back to back, and `index.npy`, the
+    (offset, count, h, w) entry of every frame.
+    """
+
+    def __init__(self, path: Union[str, Path], n: int):
+        """Inits `SparseDepthWriter` with `path` and the number of frames.
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.index = np.full((n, 4), -1, dtype=np.int64)
+        self.offset = 0
+        # A stale index would describe the points truncated below.
+        if (self.path / "index.npy").exists():
+            (self.path / "index.npy").unlink()
+        self.file = open(self.path / "points.bin", "wb")
+
+    def __enter__(self) -> "SparseDepthWriter":
+        return self
+
+    def __exit__(self, exc_type, *args) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, frame_id: int, depth: np.ndarray) -> None:
+        """Appends the valid pixels of a single depth map.
+        """
+        rows, cols = np.nonzero(depth)
+        points = np.empty(len(rows), dtype=POINT)
+        points["row"] = rows
+        points["col"] = cols
+        points["depth"] = depth[rows, cols]
+        self.file.write(points.tobytes())
+        self.index[frame_id] = [self.offset, len(points), *depth.shape]
+        self.offset += len(points)
+
+    def close(self) -> None:
+        """Flushes the points and writes the frame index.
+
+        The index is written last and atomically, a store without it is
+        incomplete.
+        """
+        if self.file.closed:
+            return
+        self.file.close()
+        partial = self.path / "index.npy.partial"
+        with open(partial, "wb") as f:
+            np.save(f, self.index)
+        os.replace(partial, self.path / "index.npy")
+
+    def abort(self) -> None:
+        """Closes the points without writing the frame index.
+        """
+        self.file.close()
+
+
+class SparseDepthReader(object):
+    """Memory mapped reader of sparse per-frame depth maps.
+
+    Frames are densified lazily, only when they are indexed.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """Inits `SparseDepthReader` with `path`.
+        """
+        self.path = Path(path)
+        self.index = np.load(self.path / "index.npy")
+        if (self.path / "points.bin").stat().st_size:
+            self.points = np.memmap(
+                self.path / "points.bin",
+                dtype=POINT,
+                mode="r")
+        else:
+            self.points = np.empty(0, dtype=POINT)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, frame_id: int) -> np.ndarray:
+        return self.dense(frame_id)
+
+    def __iter__(self):
+        for frame_id in range(len(self)):
+            yield self.dense(frame_id)
+
+    def sparse(self, frame_id: int) -> np.ndarray:
+        """Returns a view of the (row, col, depth) triplets of a frame.
+        """
+        offset, count, _, _ = self.index[frame_id]
+        if offset < 0:
+            raise KeyError(f"Frame {frame_id} was not written")
+        return self.points[offset:offset + count]
+
+    def dense(self, frame_id: int) -> np.ndarray:
+        """Returns the dense float32 depth map of a frame.
+        """
+        points = self.sparse(frame_id)
+        _, _, h, w = self.index[frame_id]
+        depth = np.zeros((h, w), dtype=np.float32)
+        depth[points["row"], points["col"]] = points["depth"]
+        return depth
@@ -0,0 +1,18 @@
+"""Evaluation Module.
+"""
+
+from .metrics import (
+    METRICS,
+    DepthMetrics,
+    align_scale_and_shift,
+    compute_errors,
+    compute_scale_and_shift)
+
+
+__all__ = [
+    "METRICS",
+    "DepthMetrics",
+    "align_scale_and_shift",
+    "compute_errors",
+    "compute_scale_and_shift"
+]
@@ -0,0 +1,164 @@
+"""Monocular Depth Metrics.
+"""
+
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+
+METRICS = ("abs_rel", "sq_rel", "rmse", "rmse_log", "a1", "a2", "a3")
+
+
+def segment_mean(
+    values: np.ndarray,
+    offsets: Optional[np.ndarray]
+) -> np.ndarray:
+    """Returns the mean of `values` per segment starting at `offsets`.
+    """
+    if offsets is None:
+        return values.mean(-1)
+    if not len(offsets):
+        return np.zeros(values.shape[:-1] + (0,))
+    counts = np.diff(np.append(offsets, values.shape[-1]))
+    return np.add.reduceat(values, offsets, axis=-1) / counts
+
+
+def segment_sum(
+    values: np.ndarray,
+    offsets: Optional[np.ndarray]
+) -> np.ndarray:
+    """Returns the sum of `values` per segment starting at `offsets`.
+    """
+    if offsets is None:
+        return values.sum(-1)
+    if not len(offsets):
+        return np.zeros(values.shape[:-1] + (0,))
+    return np.add.reduceat(values, offsets, axis=-1)
+
+
+def compute_errors(
+    ground: np.ndarray,
+    pred: np.ndarray,
+    offsets: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Compute error metrics using predicted and ground truth depths.
+
+    `ground` and `pred` hold the valid pixels only. Several frames may be
+    concatenated, `offsets` then holds the start of each frame and one
+    row of metrics is returned per frame, in the order of `METRICS`.
+    From
+    https://github.com/mrharicot/monodepth/blob/master/utils/evaluation_utils.py
+    """
+    thresh = np.maximum((ground / pred), (pred / ground))
+    diff = ground - pred
+    log_diff = np.log(ground) - np.log(pred)
+    return np.stack([
+        segment_mean(np.abs(diff) / ground, offsets),
+        segment_mean((diff ** 2) / ground, offsets),
+        np.sqrt(segment_mean(diff ** 2, offsets)),
+        np.sqrt(segment_mean(log_diff ** 2, offsets)),
+        segment_mean(thresh < 1.25, offsets),
+        segment_mean(thresh < 1.25 ** 2, offsets),
+        segment_mean(thresh < 1.25 ** 3, offsets)], axis=-1)
+
+
+def compute_scale_and_shift(
+    pred: np.ndarray,
+    target: np.ndarray,
+    offsets: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Least-squares scale and shift aligning `pred` to `target`.
+
+    Both hold the valid pixels only, `offsets` splits them into frames
+    as in `compute_errors`. Degenerate systems yield zeros.
+    From https://gist.github.com/ranftlr/a1c7a24ebb24ce0e2f2ace5bce917022
+    """
+    # system matrix: A = [[a_00, a_01], [a_10, a_11]]
+    a_00 = segment_sum(pred * pred, offsets)
+    a_01 = segment_sum(pred, offsets)
+    a_11 = segment_sum(np.ones_like(pred), offsets)
+    # right hand side: b = [b_0, b_1]
+    b_0 = segment_sum(pred * target, offsets)
+    b_1 = segment_sum(target, offsets)
+    det = a_00 * a_11 - a_01 * a_01
+    # A needs to be a positive definite matrix.
+    valid = det > 0
+    det = np.where(valid, det, 1.0)
+    x_0 = np.where(valid, (a_11 * b_0 - a_01 * b_1) / det, 0.0)
+    x_1 = np.where(valid, (-a_01 * b_0 + a_00 * b_1) / det, 0.0)
+    return x_0, x_1
+
+
+def align_scale_and_shift(
+    pred: np.ndarray,
+    ground: np.ndarray,
+    max_depth: float = 80.0,
+    min_depth: float = 1e-3
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Aligns relative disparities to ground truth depths.
+
+    `pred` and `ground` are dense maps of shape [h, w] or [n, h, w]. Only
+    the valid pixels are gathered, returns their ground truth depths, the
+    aligned predicted depths and the offset of each frame. Frames without
+    valid pixels are skipped.
+    """
+    ground = ground.reshape(-1, *ground.shape[-2:])
+    pred = pred.reshape(ground.shape)
+    mask = (ground > min_depth) & (ground < max_depth)
+    counts = mask.sum(axis=(1, 2))
+    mask = mask[counts > 0]
+    ground = ground[counts > 0]
+    pred = pred[counts > 0]
+    counts = counts[counts > 0]
+    offsets = np.cumsum(counts) - counts
+    ground = ground[mask].astype(np.float64)
+    pred = pred[mask].astype(np.float64)
+    scale, shift = compute_scale_and_shift(pred, 1.0 / ground, offsets)
+    frames = np.repeat(np.arange(len(counts)), counts)
+    aligned = scale[frames] * pred + shift[frames]
+    aligned = np.maximum(aligned, 1.0 / max_depth)
+    return ground, 1.0 / aligned, offsets
+
+
+class DepthMetrics(object):
+    """Streaming accumulator of per-frame depth metrics.
+    """
+
+    def __init__(self, max_depth: float = 80.0, min_depth: float = 1e-3):
+        """Inits `DepthMetrics` with the valid depth range.
+        """
+        self.max_depth = max_depth
+        self.min_depth = min_depth
+        self.total = np.zeros(len(METRICS))
+        self.count = 0
+
+    def update(self, pred: np.ndarray, ground: np.ndarray) -> np.ndarray:
+        """Adds a frame, or a batch of frames, and returns their metrics.
+        """
+        errors = self.evaluate(pred, ground)
+        self.add(errors)
+        return errors
+
+    def evaluate(self, pred: np.ndarray, ground: np.ndarray) -> np.ndarray:
+        """Returns the metrics of a frame, or a batch of frames.
+
+        Does not touch the accumulator, so it is safe to call from
+        several threads.
+        """
+        ground, pred, offsets = align_scale_and_shift(
+            pred,
+            ground,
+            self.max_depth,
+            self.min_depth)
+        return compute_errors(ground, pred, offsets)
+
+    def add(self, errors: np.ndarray) -> None:
+        """Adds metrics computed by `evaluate`.
+        """
+        self.total += errors.sum(0)
+        self.count += len(errors)
+
+    def result(self) -> Dict[str, float]:
+        """Returns the mean of every metric over the frames added so far.
+        """
+        mean = self.total / max(self.count, 1)
+        return dict(zip(METRICS, mean.tolist()))
@@ -0,0 +1,33 @@
+"""Prediction Scoring.
+"""
+
+import cv2
+import numpy as np
+from pathlib import Path
+from typing import Optional
+from .metrics import DepthMetrics
+
+
+def score(
+    metrics: DepthMetrics,
+    dep: np.ndarray,
+    ground,
+    i: int,
+    path_to_output: Optional[Path] = None
+) -> np.ndarray:
+    """Resizes a single prediction and scores it, runs in a worker thread.
+
+    `dep` is normalized to [0, 255] and resized to the ground truth of
+    frame `i` in `ground`, a `SparseDepthReader`. It is written to
+    `path_to_output` as a 16-bit png if set. Returns the metrics of the
+    frame without adding them to `metrics`.
+    """
+    target = ground[i]
+    h, w = target.shape
+    dep = (dep - dep.min()) / (dep.max() - dep.min()) * 255.0
+    dep = cv2.resize(dep, (w, h))
+    if path_to_output is not None:
+        cv2.imwrite(
+            str(path_to_output / f"{str(i).zfill(4)}.png"),
+            (dep * 256.0).astype(np.uint16))
+    return metrics.evaluate(dep, target)
@@ -1,11 +1,24 @@
 """ML Models.
+
+Models are imported on first access only, `Pydnet` alone does not need
+the freezing and export tooling.
 """
 
-from .pydnet import Pydnet
-from .pydnet_utils import freeze_pydnet
+from pydnet._lazy import lazy
+
+
+_SUBMODULES = {
+    "Pydnet": ".pydnet",
+    "freeze_pydnet": ".pydnet_utils",
+    "freeze_pydnet_graph": ".pydnet_utils",
+}
 
 
 __all__ = [
     "Pydnet",
-    "freeze_pydnet"
+    "freeze_pydnet",
+    "freeze_pydnet_graph"
 ]
+
+
+__getattr__, __dir__ = lazy(__name__, _SUBMODULES)
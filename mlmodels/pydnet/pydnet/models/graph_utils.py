@@ -0,0 +1,151 @@
+"""Frozen Graph Utilities.
+"""
+
+import time
+import numpy as np
+import tensorflow as tf
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from tensorflow.python.framework import tensor_util
+from tensorflow.tools.graph_transforms import TransformGraph
+
+
+TRANSFORMS = [
+    "remove_nodes(op=Identity, op=CheckNumerics, op=StopGradient)",
+    "fold_constants(ignore_errors=true)",
+    "strip_unused_nodes",
+    "sort_by_execution_order",
+]
+
+
+def node_name(tensor: str) -> str:
+    """Returns the name of the node producing `tensor`.
+    """
+    return tensor.lstrip("^").split(":")[0]
+
+
+def resolve_const(
+    nodes: Dict[str, tf.NodeDef],
+    name: str
+) -> Optional[tf.NodeDef]:
+    """Follows `Identity` nodes from `name` up to a `Const` node.
+    """
+    node = nodes.get(node_name(name))
+    while node is not None and node.op == "Identity":
+        node = nodes.get(node_name(node.input[0]))
+    if node is None or node.op != "Const":
+        return None
+    return node
+
+
+def load_graph(path: Path) -> tf.GraphDef:
+    """Reads a frozen graph from a `.pb` file.
+    """
+    graph_def = tf.GraphDef()
+    with open(path, "rb") as f:
+        graph_def.ParseFromString(f.read())
+    return graph_def
+
+
+def graph_outputs(graph_def: tf.GraphDef) -> List[str]:
+    """Returns the names of the nodes no other node consumes.
+    """
+    consumed = set(
+        node_name(tensor)
+        for node in graph_def.node
+        for tensor in node.input)
+    return [
+        node.name for node in graph_def.node
+        if node.name not in consumed
+        and node.op not in ("Const", "NoOp", "Placeholder")]
+
+
+def fold_input_scaling(graph_def: tf.GraphDef) -> tf.GraphDef:
+    """Folds scalar input scaling into the weights of the following conv.
+
+    Rewrites `conv2d(x / c, W)` into `conv2d(x, W / c)`, and likewise for
+    multiplications, which holds as convolution is linear and the zero
+    padding is unaffected by scaling.
+    """
+    nodes = {node.name: node for node in graph_def.node}
+    consumers = defaultdict(list)
+    for node in graph_def.node:
+        for tensor in node.input:
+            consumers[node_name(tensor)].append(node)
+
+    for scale in list(graph_def.node):
+        if scale.op not in ("RealDiv", "Mul"):
+            continue
+        const = resolve_const(nodes, scale.input[1])
+        users = consumers[scale.name]
+        if const is None or len(users) != 1:
+            continue
+        conv = users[0]
+        if conv.op != "Conv2D" or node_name(conv.input[0]) != scale.name:
+            continue
+        weights = resolve_const(nodes, conv.input[1])
+        factor = tensor_util.MakeNdarray(const.attr["value"].tensor)
+        if weights is None or factor.size != 1:
+            continue
+        value = tensor_util.MakeNdarray(weights.attr["value"].tensor)
+        if scale.op == "RealDiv":
+            value = value / factor
+        else:
+            value = value * factor
+        folded = graph_def.node.add()
+        folded.op = "Const"
+        folded.name = f"{weights.name}/folded"
+        folded.attr["dtype"].type = weights.attr["dtype"].type
+        folded.attr["value"].tensor.CopyFrom(
+            tensor_util.make_tensor_proto(value.astype(np.float32)))
+        conv.input[0] = scale.input[0]
+        conv.input[1] = folded.name
+    return graph_def
+
+
+def optimize_graph(
+    graph_def: tf.GraphDef,
+    inputs: Sequence[str],
+    outputs: Sequence[str]
+) -> tf.GraphDef:
+    """Optimizes a frozen graph for inference.
+
+    Folds the input scaling, strips identity and training-only nodes and
+    folds constants. Convolution, bias and activation are left unfused,
+    as TF 1.15 fuses them in the grappler remapper at session runtime
+    only, and its `_FusedConv2D` nodes cannot be converted to Core ML.
+    """
+    optimized = tf.GraphDef()
+    optimized.CopyFrom(graph_def)
+    optimized = fold_input_scaling(optimized)
+    return TransformGraph(optimized, inputs, outputs, TRANSFORMS)
+
+
+def profile_graph(
+    graph_def: tf.GraphDef,
+    input: str,
+    output: str,
+    shape: Sequence[int],
+    runs: int = 50,
+    warmup: int = 5
+) -> Dict[str, float]:
+    """Returns the node count and the median CPU latency of a graph.
+    """
+    shape = [1 if d is None else d for d in shape]
+    with tf.Graph().as_default() as graph:
+        tf.import_graph_def(graph_def, name="")
+        feed = {f"{input}:0": np.random.rand(*shape).astype(np.float32)}
+        fetch = graph.get_tensor_by_name(f"{output}:0")
+        config = tf.ConfigProto(device_count={"GPU": 0})
+        with tf.Session(config=config) as sess:
+            latencies = []
+            for i in range(warmup + runs):
+                start = time.perf_counter()
+                sess.run(fetch, feed)
+                if i >= warmup:
+                    latencies.append(time.perf_counter() - start)
+    return {
+        "nodes": len(graph_def.node),
+        "latency": 1000.0 * float(np.median(latencies)),
+    }
@@ -0,0 +1,98 @@
+"""Self-Supervised Stereo Losses.
+"""
+
+import tensorflow as tf
+from typing import Dict, Sequence, Tuple
+
+
+def to_disparity(pred: tf.Tensor) -> tf.Tensor:
+    """Maps a raw PyDnet output to a disparity in fractions of the width.
+
+    The output is read as a disparity in pixels behind the same ReLU the
+    exported graphs apply, so training and inference agree.
+    """
+    return tf.nn.relu(pred) / pred.shape.as_list()[2]
+
+
+def warp_horizontal(image: tf.Tensor, disp: tf.Tensor) -> tf.Tensor:
+    """Samples `image` at `x - disp`, bilinearly along the rows.
+
+    Reconstructs the left image from the right one and the left disparity.
+    """
+    _, _, w, _ = image.shape.as_list()
+    x = tf.range(w, dtype=tf.float32) - disp[..., 0] * w
+    x = tf.clip_by_value(x, 0.0, w - 1.0)
+    x0 = tf.floor(x)
+    weight = tf.expand_dims(x - x0, -1)
+    x0 = tf.cast(x0, tf.int32)
+    x1 = tf.minimum(x0 + 1, w - 1)
+    left = tf.gather(image, x0, axis=2, batch_dims=2)
+    right = tf.gather(image, x1, axis=2, batch_dims=2)
+    return left * (1.0 - weight) + right * weight
+
+
+def ssim(x: tf.Tensor, y: tf.Tensor) -> tf.Tensor:
+    """Structural dissimilarity over 3x3 windows, in [0, 1].
+    """
+    def pool(t):
+        return tf.nn.avg_pool2d(t, 3, 1, "VALID")
+
+    c1, c2 = 0.01 ** 2, 0.03 ** 2
+    mu_x, mu_y = pool(x), pool(y)
+    sigma_x = pool(x ** 2) - mu_x ** 2
+    sigma_y = pool(y ** 2) - mu_y ** 2
+    sigma_xy = pool(x * y) - mu_x * mu_y
+    n = (2 * mu_x * mu_y + c1) * (2 * sigma_xy + c2)
+    d = (mu_x ** 2 + mu_y ** 2 + c1) * (sigma_x + sigma_y + c2)
+    return tf.clip_by_value((1 - n / d) / 2, 0, 1)
+
+
+def photometric_loss(
+    target: tf.Tensor,
+    estimate: tf.Tensor,
+    alpha: float = 0.85
+) -> tf.Tensor:
+    """Weighted SSIM and L1 reconstruction error.
+    """
+    l1 = tf.reduce_mean(tf.abs(target - estimate))
+    return alpha * tf.reduce_mean(ssim(target, estimate)) + (1 - alpha) * l1
+
+
+def smoothness_loss(disp: tf.Tensor, image: tf.Tensor) -> tf.Tensor:
+    """Edge-aware first order smoothness of the mean-normalized disparity.
+    """
+    disp = disp / (tf.reduce_mean(disp, axis=[1, 2], keepdims=True) + 1e-7)
+    dx = tf.abs(disp[:, :, 1:] - disp[:, :, :-1])
+    dy = tf.abs(disp[:, 1:] - disp[:, :-1])
+    ix = tf.reduce_mean(
+        tf.abs(image[:, :, 1:] - image[:, :, :-1]), 3, keepdims=True)
+    iy = tf.reduce_mean(
+        tf.abs(image[:, 1:] - image[:, :-1]), 3, keepdims=True)
+    return tf.reduce_mean(dx * tf.exp(-ix)) + tf.reduce_mean(dy * tf.exp(-iy))
+
+
+def stereo_loss(
+    preds: Sequence[tf.Tensor],
+    left: tf.Tensor,
+    right: tf.Tensor,
+    smoothness: float = 0.1,
+    alpha: float = 0.85
+) -> Tuple[tf.Tensor, Dict[str, tf.Tensor]]:
+    """Multi-scale photometric and smoothness loss of a stereo pair.
+
+    `preds` are the full resolution outputs of a training PyDnet, finest
+    first, and `left`, `right` the images in [0, 1]. The smoothness term
+    halves at every coarser scale. Returns the total and its components.
+    """
+    photometric, smooth = [], []
+    for scale, pred in enumerate(preds):
+        disp = to_disparity(pred)
+        estimate = warp_horizontal(right, disp)
+        photometric.append(photometric_loss(left, estimate, alpha))
+        smooth.append(smoothness_loss(disp, left) / 2 ** scale)
+    photometric = tf.add_n(photometric)
+    smooth = tf.add_n(smooth)
+    return photometric + smoothness * smooth, {
+        "photometric": photometric,
+        "smoothness": smooth,
+    }
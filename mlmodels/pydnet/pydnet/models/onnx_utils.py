@@ -0,0 +1,52 @@
+"""ONNX Export Utilities.
+"""
+
+import onnx
+import numpy as np
+import tensorflow as tf
+from typing import Sequence
+
+
+def convert_onnx(
+    graph_def: tf.GraphDef,
+    inputs: Sequence[str],
+    outputs: Sequence[str],
+    opset: int = 11
+) -> onnx.ModelProto:
+    """Converts a frozen graph into a checked ONNX model.
+
+    tf2onnx runs its graph-level optimizers while converting, namely
+    constant folding, identity and transpose elimination, duplicated node
+    merging and back-to-back op fusion.
+    """
+    from tf2onnx.convert import from_graph_def
+    model, _ = from_graph_def(
+        graph_def,
+        input_names=[f"{name}:0" for name in inputs],
+        output_names=[f"{name}:0" for name in outputs],
+        opset=opset)
+    model = onnx.shape_inference.infer_shapes(model)
+    onnx.checker.check_model(model)
+    return model
+
+
+class ONNXPredictor(object):
+    """Runs an ONNX model with onnxruntime, or onnx-tf if not installed.
+    """
+
+    def __init__(self, model: onnx.ModelProto):
+        """Inits `ONNXPredictor` with the ONNX model.
+        """
+        try:
+            import onnxruntime
+        except ImportError:
+            from onnx_tf.backend import prepare
+            backend = prepare(model)
+            self.run = lambda image: backend.run(image)[0]
+        else:
+            session = onnxruntime.InferenceSession(model.SerializeToString())
+            name = session.get_inputs()[0].name
+            self.run = lambda image: session.run(None, {name: image})[0]
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        return self.run(image.astype(np.float32))
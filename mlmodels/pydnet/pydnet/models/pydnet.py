@@ -1,10 +1,31 @@
 """PyDNet Module.
 """
 
+import numpy as np
 import tensorflow as tf
 from .functions import leaky_conv2d, bilinear_upsampling_by_convolution
 
 
+ENCODER = (16, 32, 64, 96, 128, 192)
+ESTIMATOR = (96, 64, 32, 8)
+
+
+def architecture(width=1.0, levels=6, estimator=None):
+    """Makes the `Pydnet` architecture params from CLI arguments.
+    Args:
+        width (float): The encoder width multiplier.
+        levels (int): The pyramid depth.
+        estimator (list): The estimator channels, `ESTIMATOR` if not given.
+    Returns:
+        dict: The `width`, `levels` and `estimator` params.
+    """
+    return {
+        "width": float(width),
+        "levels": int(levels),
+        "estimator": [int(c) for c in (estimator or ESTIMATOR)],
+    }
+
+
 class Pydnet(object):
     """Tensorflow PyDNet model.
 
@@ -13,131 +34,135 @@ class Pydnet(object):
 
     def __init__(self, params):
         """Inits `Pydnet` with `params`.
+
+        `exit_level` (1, 2 or 3) selects the pyramid level the decoder
+        stops at, `resize` whether its output is resized to `h`x`w`.
+        `levels` (3 to 6) sets the pyramid depth, `width` multiplies the
+        encoder channels and `estimator` lists the channels of every
+        estimator layer. The defaults build the published model.
         """
         self.h = params["h"]
         self.w = params["w"]
         self.is_training = params["is_training"]
+        self.exit_level = params.get("exit_level", 1)
+        self.resize = params.get("resize", True)
+        self.levels = params.get("levels", 6)
+        self.width = params.get("width", 1.0)
+        self.estimator = tuple(params.get("estimator", ESTIMATOR))
+        if self.exit_level not in (1, 2, 3):
+            raise ValueError(f"Invalid exit level: {self.exit_level}")
+        if self.levels not in range(3, len(ENCODER) + 1):
+            raise ValueError(f"Invalid number of levels: {self.levels}")
+        self.channels = [
+            max(1, int(round(c * self.width)))
+            for c in ENCODER[:self.levels]]
         self.output_nodes = None
+        self.upsampled_nodes = {}
+        self.flops = 0
+        self.parameters = 0
 
     def forward(self, image):
         """Single forward of the network.
+
+        The batch dimension of `image` may be `None`. The FLOPs per image
+        and the parameters of the built graph are set on `flops` and
+        `parameters`.
         """
+        graph = tf.get_default_graph()
+        start = len(graph.get_operations())
         image = image / 255.0
         feat = self.encoder(image)
         pred = self.decoder(feat)
         if not self.is_training:
             self.output_nodes = [self.make_visual(pred)]
+        self.count(graph.get_operations()[start:])
         return pred
 
+    def count(self, ops):
+        """Counts the convolution FLOPs per image and the parameters.
+
+        Ops are counted rather than variables, so that towers sharing the
+        variables count them too.
+        """
+        self.flops, self.parameters = 0, 0
+        for op in ops:
+            if op.type == "Conv2D":
+                kernel = op.inputs[1].shape.as_list()
+                _, h, w, _ = op.outputs[0].shape.as_list()
+                self.parameters += int(np.prod(kernel))
+                self.flops += 2 * int(np.prod(kernel)) * h * w
+            elif op.type == "BiasAdd":
+                self.parameters += op.inputs[1].shape.as_list()[0]
+
     def make_visual(self, pred):
         """Makes visual ouput nodes of the model.
+
+        Each sample is normalized by its own min/max. A batch of exactly one
+        is squeezed to a single [h, w] map.
         """
-        pred = tf.squeeze(tf.nn.relu(pred))
-        min_depth = tf.reduce_min(pred)
-        max_depth = tf.reduce_max(pred)
+        pred = tf.squeeze(tf.nn.relu(pred), axis=3)
+        min_depth = tf.reduce_min(pred, axis=[1, 2], keepdims=True)
+        max_depth = tf.reduce_max(pred, axis=[1, 2], keepdims=True)
         pred = (pred - min_depth) / (max_depth - min_depth)
+        if pred.shape[0] == 1:
+            pred = tf.squeeze(pred, axis=0)
         return pred * 255.0
 
     def encoder(self, image):
         """Creates PyDNet feature extractor.
         """
         with tf.variable_scope("encoder"):
-            feat = []
-            feat.append(image)
-
-            with tf.variable_scope("conv1a"):
-                conv1a = leaky_conv2d(image, [3, 3, 3, 16], [16], 2, True)
-            with tf.variable_scope("conv1b"):
-                conv1b = leaky_conv2d(conv1a, [3, 3, 16, 16], [16], 1, True)
-            feat.append(conv1b)
-
-            with tf.variable_scope("conv2a"):
-                conv2a = leaky_conv2d(conv1b, [3, 3, 16, 32], [32], 2, True)
-            with tf.variable_scope("conv2b"):
-                conv2b = leaky_conv2d(conv2a, [3, 3, 32, 32], [32], 1, True)
-            feat.append(conv2b)
-
-            with tf.variable_scope("conv3a"):
-                conv3a = leaky_conv2d(conv2b, [3, 3, 32, 64], [64], 2, True)
-            with tf.variable_scope("conv3b"):
-                conv3b = leaky_conv2d(conv3a, [3, 3, 64, 64], [64], 1, True)
-            feat.append(conv3b)
-
-            with tf.variable_scope("conv4a"):
-                conv4a = leaky_conv2d(conv3b, [3, 3, 64, 96], [96], 2, True)
-            with tf.variable_scope("conv4b"):
-                conv4b = leaky_conv2d(conv4a, [3, 3, 96, 96], [96], 1, True)
-            feat.append(conv4b)
-
-            with tf.variable_scope("conv5a"):
-                conv5a = leaky_conv2d(conv4b, [3, 3, 96, 128], [128], 2, True)
-            with tf.variable_scope("conv5b"):
-                conv5b = leaky_conv2d(conv5a, [3, 3, 128, 128], [128], 1, True)
-            feat.append(conv5b)
-
-            with tf.variable_scope("conv6a"):
-                conv6a = leaky_conv2d(conv5b, [3, 3, 128, 192], [192], 2, True)
-            with tf.variable_scope("conv6b"):
-                conv6b = leaky_conv2d(conv6a, [3, 3, 192, 192], [192], 1, True)
-            feat.append(conv6b)
-
+            feat = [image]
+            for level, channels in enumerate(self.channels, 1):
+                with tf.variable_scope(f"conv{level}a"):
+                    conv = leaky_conv2d(
+                        feat[-1],
+                        [3, 3, feat[-1].shape[3], channels],
+                        [channels],
+                        2,
+                        True)
+                with tf.variable_scope(f"conv{level}b"):
+                    conv = leaky_conv2d(
+                        conv,
+                        [3, 3, channels, channels],
+                        [channels],
+                        1,
+                        True)
+                feat.append(conv)
             return feat
 
     def decoder(self, feat):
         """Creates PyDNet decoder.
+
+        Levels below `exit_level` are not built. The upsampled estimate of
+        every coarser level is kept in `upsampled_nodes`, feeding one of
+        them skips all the levels above it.
         """
         with tf.variable_scope("decoder"):
-            with tf.variable_scope("L6"):
-                with tf.variable_scope("estimator"):
-                    conv6 = self.build_estimator(feat[6])
-                    # pred6 = self.get_disp(conv6)
-                with tf.variable_scope("upsampler"):
-                    upconv6 = bilinear_upsampling_by_convolution(conv6)
-
-            with tf.variable_scope("L5"):
-                with tf.variable_scope("estimator"):
-                    conv5 = self.build_estimator(feat[5], upconv6)
-                    # pred5 = self.get_disp(conv5)
-                with tf.variable_scope("upsampler"):
-                    upconv5 = bilinear_upsampling_by_convolution(conv5)
-
-            with tf.variable_scope("L4"):
-                with tf.variable_scope("estimator"):
-                    conv4 = self.build_estimator(feat[4], upconv5)
-                    # pred4 = self.get_disp(conv4)
-                with tf.variable_scope("upsampler"):
-                    upconv4 = bilinear_upsampling_by_convolution(conv4)
-
-            with tf.variable_scope("L3"):
-                with tf.variable_scope("estimator"):
-                    conv3 = self.build_estimator(feat[3], upconv4)
-                    pred3 = self.get_disp(conv3)
-                with tf.variable_scope("upsampler"):
-                    upconv3 = bilinear_upsampling_by_convolution(conv3)
-
-            with tf.variable_scope("L2"):
-                with tf.variable_scope("estimator"):
-                    conv2 = self.build_estimator(feat[2], upconv3)
-                    pred2 = self.get_disp(conv2)
-                with tf.variable_scope("upsampler"):
-                    upconv2 = bilinear_upsampling_by_convolution(conv2)
-
-            with tf.variable_scope("L1"):
-                with tf.variable_scope("estimator"):
-                    conv1 = self.build_estimator(feat[1], upconv2)
-                    pred1 = self.get_disp(conv1)
+            preds = {}
+            upconv = None
+            for level in range(self.levels, self.exit_level - 1, -1):
+                with tf.variable_scope(f"L{level}"):
+                    with tf.variable_scope("estimator"):
+                        conv = self.build_estimator(feat[level], upconv)
+                        if level <= 3:
+                            preds[level] = self.get_disp(conv)
+                    if level > self.exit_level:
+                        with tf.variable_scope("upsampler"):
+                            upconv = bilinear_upsampling_by_convolution(conv)
+                        self.upsampled_nodes[level] = upconv
 
             size = [self.h, self.w]
             if not self.is_training:
-                with tf.variable_scope("half"):
-                    pred1 = tf.image.resize_images(pred1, size)
-                return pred1
- 
-            pred1 = tf.image.resize_images(pred1, size)
-            pred2 = tf.image.resize_images(pred2, size)
-            pred3 = tf.image.resize_images(pred3, size)
+                pred = preds[self.exit_level]
+                if self.resize:
+                    with tf.variable_scope("half"):
+                        pred = tf.image.resize_images(pred, size)
+                return pred
 
-            return [pred1, pred2, pred3]
+            return [
+                tf.image.resize_images(preds[level], size)
+                for level in range(self.exit_level, 4)]
 
     def get_disp(self, x):
         """Returns disparity.
@@ -150,35 +175,15 @@ class Pydnet(object):
         """
         with tf.variable_scope("build_estimator"):
             if upsampled_disp is not None:
-                disp2 = tf.concat([feat, upsampled_disp], -1)
+                disp = tf.concat([feat, upsampled_disp], -1)
             else:
-                disp2 = feat
-            with tf.variable_scope("disp-3"):
-                disp3 = leaky_conv2d(
-                    disp2,
-                    [3, 3, disp2.shape[3], 96],
-                    [96],
-                    1,
-                    True)
-            with tf.variable_scope("disp-4"):
-                disp4 = leaky_conv2d(
-                    disp3,
-                    [3, 3, disp3.shape[3], 64],
-                    [64],
-                    1,
-                    True)
-            with tf.variable_scope("disp-5"):
-                disp5 = leaky_conv2d(
-                    disp4,
-                    [3, 3, disp4.shape[3], 32],
-                    [32],
-                    1,
-                    True)
-            with tf.variable_scope("disp-6"):
-                disp6 = leaky_conv2d(
-                    disp5,
-                    [3, 3, disp5.shape[3], 8],
-                    [8],
-                    1,
-                    True)
-            return disp6
+                disp = feat
+            for layer, channels in enumerate(self.estimator, 3):
+                with tf.variable_scope(f"disp-{layer}"):
+                    disp = leaky_conv2d(
+                        disp,
+                        [3, 3, disp.shape[3], channels],
+                        [channels],
+                        1,
+                        True)
+            return disp
@@ -1,13 +1,12 @@
 """PyDnet Model Freezer.
 """
 
-import os
 import tensorflow as tf
-import coremltools as ct
 from pathlib import Path
-from typing import Any, Dict
-from tensorflow.python.tools import freeze_graph
+from typing import Dict, Optional
 from tensorflow.compat.v1.graph_util import convert_variables_to_constants
+from tabulate import tabulate
+from .graph_utils import optimize_graph, profile_graph
 from .pydnet import Pydnet
 
 
@@ -16,8 +15,13 @@ def freeze_pydnet(
     h: int,
     w: int,
     checkpoint: Path,
-    output: Path
-) -> Dict[str, Any]:
+    output: Path,
+    batch: Optional[int] = 1,
+    optimize: bool = False,
+    exit_level: int = 1,
+    resize: bool = True,
+    architecture: Optional[Dict] = None
+) -> Path:
     """Freezes the PyDnet model.
     Args:
         name(str): The name of the architecture.
@@ -25,31 +29,103 @@ def freeze_pydnet(
         w (int): The image wodth.
         checkpoint (pathlib.Paht): The path to the checkpoint file.
         output (pathlib.Paht): The path to the output directory.
+        batch (int): The batch size, `None` for a dynamic batch.
+        optimize (bool): Optimizes the frozen graph and reports the node
+            count and CPU latency before and after.
+        exit_level (int): The pyramid level the decoder stops at.
+        resize (bool): Resizes the output to the image size.
+        architecture (dict): The `levels`, `width` and `estimator` of the
+            checkpoint, see `Pydnet`.
+    """
+    graph_def = freeze_pydnet_graph(
+        h,
+        w,
+        checkpoint,
+        batch,
+        optimize,
+        exit_level,
+        resize,
+        architecture=architecture)
+    tf.train.write_graph(
+        graph_def,
+        str(output),
+        f"{name}.pb",
+        as_text=False)
+    return (output / f"{name}.pb").resolve()
+
+
+def freeze_pydnet_graph(
+    h: int,
+    w: int,
+    checkpoint: Path,
+    batch: Optional[int] = 1,
+    optimize: bool = False,
+    exit_level: int = 1,
+    resize: bool = True,
+    report: bool = True,
+    architecture: Optional[Dict] = None
+) -> tf.GraphDef:
+    """Freezes the PyDnet model in memory, see `freeze_pydnet`.
+
+    The complexity and optimization reports are only printed if `report`
+    is set.
     """
     with tf.Graph().as_default() as graph:
         placeholder = tf.placeholder(
             tf.float32,
-            [1, h, w, 3],
+            [batch, h, w, 3],
             name="In",
         )
         network = Pydnet({
             "h": h,
             "w": w,
             "is_training": False,
+            "exit_level": exit_level,
+            "resize": resize,
+            **(architecture or {}),
         })
         network.forward(placeholder)
+        if report:
+            report_complexity(network)
         save = tf.train.Saver()
         with tf.Session() as sess:
             save.restore(sess, str(checkpoint))
             # NOTE: This is a workaround to prevent using the `freeze_graph` function.
             # `freeze_graph` may cause an `IndexError.`
+            outputs = [x.name.replace(":0", "") for x in network.output_nodes]
             graph_def = convert_variables_to_constants(
                 sess,
                 graph.as_graph_def(),
-                [x.name.replace(":0", "") for x in network.output_nodes])
-            tf.train.write_graph(
-                graph_def,
-                str(output),
-                f"{name}.pb",
-                as_text=False)
-    return (output / f"{name}.pb").resolve()
+                outputs)
+    if optimize:
+        shape = [batch, h, w, 3]
+        optimized = optimize_graph(graph_def, ["In"], outputs)
+        if report:
+            report_optimization(
+                profile_graph(graph_def, "In", outputs[0], shape),
+                profile_graph(optimized, "In", outputs[0], shape))
+        graph_def = optimized
+    return graph_def
+
+
+def report_optimization(before: Dict[str, float], after: Dict[str, float]):
+    """Prints the node count and CPU latency before and after optimization.
+    """
+    print(tabulate(
+        [
+            ["nodes", before["nodes"], after["nodes"]],
+            ["latency [ms]", before["latency"], after["latency"]],
+        ],
+        headers=["", "frozen", "optimized"]))
+
+
+def report_complexity(network: Pydnet):
+    """Prints the FLOPs per image and the parameters of a built network.
+    """
+    print(tabulate(
+        [
+            ["levels", network.levels],
+            ["width", network.width],
+            ["GFLOPs", network.flops / 1e9],
+            ["parameters [M]", network.parameters / 1e6],
+        ]))
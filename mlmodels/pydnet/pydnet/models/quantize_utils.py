@@ -0,0 +1,128 @@
+"""Post-Training Quantization Utilities.
+"""
+
+import sys
+import time
+import numpy as np
+import tensorflow as tf
+from PIL import Image
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence
+from .graph_utils import load_graph
+
+
+def quantize_mlmodel(model: object, nbits: int) -> object:
+    """Quantizes the weights of a Core ML model to `nbits`.
+
+    16 bits yields float16 weights, 8 bits linearly quantized weights.
+    """
+    from coremltools.models.neural_network import quantization_utils
+    return quantization_utils.quantize_weights(model, nbits=nbits)
+
+
+def convert_tflite(
+    path_to_pb: Path,
+    input: str,
+    output: str,
+    shape: Sequence[int],
+    mode: str = "float32",
+    representative: Optional[Callable[[], Iterable]] = None
+) -> bytes:
+    """Converts a frozen graph into a TFLite model.
+
+    `mode` is one of `float32`, `float16` or `int8`, the latter calibrates
+    activations on the batches yielded by `representative`.
+    """
+    converter = tf.lite.TFLiteConverter.from_frozen_graph(
+        str(path_to_pb),
+        [input],
+        [output],
+        {input: list(shape)})
+    if mode == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == "int8":
+        if representative is None:
+            raise ValueError("int8 quantization requires calibration data")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = tf.lite.RepresentativeDataset(
+            lambda: ([image] for image in representative()))
+    elif mode != "float32":
+        raise ValueError(f"Invalid quantization mode: {mode}")
+    return converter.convert()
+
+
+class FrozenGraphPredictor(object):
+    """Runs a frozen graph in a TensorFlow session.
+    """
+
+    def __init__(self, path_to_pb: Path, input: str, output: str):
+        """Inits `FrozenGraphPredictor` with the frozen graph file.
+        """
+        graph = tf.Graph()
+        with graph.as_default():
+            tf.import_graph_def(load_graph(path_to_pb), name="")
+        self.input = graph.get_tensor_by_name(f"{input}:0")
+        self.output = graph.get_tensor_by_name(f"{output}:0")
+        self.sess = tf.Session(graph=graph)
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        return self.sess.run(self.output, {self.input: image})
+
+
+class TFLitePredictor(object):
+    """Runs a TFLite model in the TFLite interpreter.
+    """
+
+    def __init__(self, model: bytes):
+        """Inits `TFLitePredictor` with the serialized model.
+        """
+        self.interpreter = tf.lite.Interpreter(model_content=model)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]["index"]
+        self.output = self.interpreter.get_output_details()[0]["index"]
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        self.interpreter.set_tensor(self.input, image.astype(np.float32))
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output)
+
+
+class MLModelPredictor(object):
+    """Runs a Core ML model, only available on macOS.
+    """
+
+    def __init__(self, model: object):
+        """Inits `MLModelPredictor` with the Core ML model.
+        """
+        spec = model.get_spec()
+        self.model = model
+        self.input = spec.description.input[0].name
+        self.output = spec.description.output[0].name
+
+    @staticmethod
+    def available() -> bool:
+        """Returns whether Core ML models can be run on this platform.
+        """
+        return sys.platform == "darwin"
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        image = Image.fromarray(np.squeeze(image, 0).astype(np.uint8))
+        return self.model.predict({self.input: image})[self.output]
+
+
+def profile_predictor(
+    predictor: Callable[[np.ndarray], np.ndarray],
+    image: np.ndarray,
+    runs: int = 50,
+    warmup: int = 5
+) -> float:
+    """Returns the median CPU latency of a predictor in milliseconds.
+    """
+    latencies = []
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        predictor(image)
+        if i >= warmup:
+            latencies.append(time.perf_counter() - start)
+    return 1000.0 * float(np.median(latencies))
@@ -0,0 +1,74 @@
+"""Streaming Inference Module.
+"""
+
+import numpy as np
+import tensorflow as tf
+from typing import Optional
+
+
+class StreamingPredictor(object):
+    """Runs PyDnet on consecutive frames, reusing its coarse levels.
+
+    The upsampled estimate `cache` of a coarse level is kept from the
+    last refresh and fed back on the following frames, so only the
+    encoder and the decoder levels below it are recomputed. The cache is
+    refreshed every `refresh` frames, or earlier when the mean absolute
+    difference of a `scale` times subsampled frame to the frame of the
+    last refresh, relative to its mean intensity, exceeds `threshold`.
+    """
+
+    def __init__(
+        self,
+        sess: tf.Session,
+        input: tf.Tensor,
+        output: tf.Tensor,
+        cache: tf.Tensor,
+        refresh: int = 4,
+        threshold: Optional[float] = None,
+        scale: int = 8
+    ):
+        """Inits `StreamingPredictor` with the tensors of a built PyDnet.
+        """
+        self.sess = sess
+        self.input = input
+        self.output = output
+        self.cache = cache
+        self.refresh = refresh
+        self.threshold = threshold
+        self.scale = scale
+        self.frames = 0
+        self.refreshes = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Drops the cache, e.g. at a cut between two sequences.
+        """
+        self.cached = None
+        self.reference = None
+        self.age = 0
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        thumbnail = image[:, ::self.scale, ::self.scale].mean(axis=-1)
+        self.frames += 1
+        if self.stale(thumbnail):
+            output, self.cached = self.sess.run(
+                [self.output, self.cache],
+                {self.input: image})
+            self.reference = thumbnail
+            self.age = 1
+            self.refreshes += 1
+            return output
+        self.age += 1
+        return self.sess.run(
+            self.output,
+            {self.input: image, self.cache: self.cached})
+
+    def stale(self, thumbnail: np.ndarray) -> bool:
+        """Tells whether the cache must be refreshed for `thumbnail`.
+        """
+        if self.cached is None or self.age >= self.refresh:
+            return True
+        if self.threshold is None:
+            return False
+        difference = np.abs(thumbnail - self.reference).mean()
+        return difference > self.threshold * (self.reference.mean() + 1e-6)
@@ -0,0 +1,133 @@
+"""Tiled Inference Module.
+"""
+
+import numpy as np
+import tensorflow as tf
+from typing import Iterator, List, Tuple
+from pydnet.eval.metrics import compute_scale_and_shift
+
+
+def activation_bytes(graph: tf.Graph) -> int:
+    """Estimates the activation bytes of a single sample of `graph`.
+
+    Sums up every float tensor with a dynamic batch axis, an upper bound
+    of what the allocator keeps alive at once.
+    """
+    total = 0
+    for op in graph.get_operations():
+        for tensor in op.outputs:
+            shape = tensor.shape
+            if shape.rank is None or shape.rank == 0:
+                continue
+            if shape[0].value is not None or not tensor.dtype.is_floating:
+                continue
+            if not shape[1:].is_fully_defined():
+                continue
+            size = tensor.dtype.size
+            total += size * int(np.prod(shape[1:].as_list()))
+    return total
+
+
+def tile_starts(size: int, tile: int, overlap: int) -> List[int]:
+    """Returns tile offsets covering `size` with at least `overlap`.
+    """
+    if size <= tile:
+        return [0]
+    count = int(np.ceil((size - overlap) / (tile - overlap)))
+    return np.linspace(0, size - tile, count).round().astype(int).tolist()
+
+
+def blend_window(h: int, w: int, overlap: int) -> np.ndarray:
+    """Returns blending weights ramping up over `overlap` pixels.
+    """
+    def ramp(n):
+        r = np.minimum(np.arange(1, n + 1), np.arange(n, 0, -1))
+        return np.minimum(r / (overlap + 1), 1.0)
+    return np.outer(ramp(h), ramp(w)).astype(np.float32)
+
+
+class TiledPredictor(object):
+    """Runs PyDnet on images of any size in overlapping tiles.
+
+    `input` is a [None, h, w, 3] placeholder and `output` the disparity
+    of the network built on it at the tile resolution. Tiles are batched
+    as many as fit `budget` bytes of activations. Monocular disparity is
+    only known up to scale and shift per tile, so every tile is aligned
+    to the blended tiles it overlaps before being blended in, and the
+    image is normalized once as a whole.
+    """
+
+    def __init__(
+        self,
+        sess: tf.Session,
+        input: tf.Tensor,
+        output: tf.Tensor,
+        overlap: int = 64,
+        budget: int = 512 * 2 ** 20
+    ):
+        """Inits `TiledPredictor` with the tensors of a built PyDnet.
+        """
+        self.sess = sess
+        self.input = input
+        self.output = output
+        _, self.h, self.w, _ = input.shape.as_list()
+        if not 0 <= overlap < min(self.h, self.w):
+            raise ValueError(f"Invalid overlap: {overlap}")
+        self.overlap = overlap
+        per_tile = activation_bytes(input.graph)
+        if per_tile > budget:
+            raise ValueError(
+                f"A {self.h}x{self.w} tile needs {per_tile} bytes, "
+                f"over the budget of {budget} bytes")
+        self.batch = budget // per_tile
+        self.window = blend_window(self.h, self.w, overlap)
+
+    def tiles(self, h: int, w: int) -> Iterator[Tuple[int, int]]:
+        """Yields the tile offsets of an `h`x`w` image in raster order.
+        """
+        for y in tile_starts(h, self.h, self.overlap):
+            for x in tile_starts(w, self.w, self.overlap):
+                yield y, x
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        """Predicts the [h, w] depth of an [h, w, 3] image in [0, 255].
+        """
+        h, w, _ = image.shape
+        ph, pw = max(h, self.h), max(w, self.w)
+        if (ph, pw) != (h, w):
+            image = np.pad(
+                image,
+                [(0, ph - h), (0, pw - w), (0, 0)],
+                "edge")
+        total = np.zeros([ph, pw], np.float32)
+        weight = np.zeros([ph, pw], np.float32)
+        offsets = list(self.tiles(ph, pw))
+        for start in range(0, len(offsets), self.batch):
+            batch = offsets[start:start + self.batch]
+            preds = self.sess.run(self.output, {self.input: np.stack([
+                image[y:y + self.h, x:x + self.w] for y, x in batch])})
+            for (y, x), pred in zip(batch, preds):
+                pred = pred.reshape(self.h, self.w)
+                region = np.s_[y:y + self.h, x:x + self.w]
+                self.blend(pred, total[region], weight[region])
+        depth = (total / weight)[:h, :w]
+        depth -= depth.min()
+        return depth / max(depth.max(), 1e-6) * 255.0
+
+    def blend(
+        self,
+        pred: np.ndarray,
+        total: np.ndarray,
+        weight: np.ndarray
+    ) -> None:
+        """Aligns `pred` to the blended tiles it overlaps and adds it.
+        """
+        covered = weight > 0
+        if covered.any():
+            scale, shift = compute_scale_and_shift(
+                pred[covered],
+                total[covered] / weight[covered])
+            if scale > 0:
+                pred = scale * pred + shift
+        total += pred * self.window
+        weight += self.window
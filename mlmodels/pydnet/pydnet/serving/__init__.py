@@ -0,0 +1,24 @@
+"""Serving Module.
+
+The server and the worker pool are imported on first access only, a load
+generator does not need TensorFlow.
+"""
+
+from pydnet._lazy import lazy
+
+
+_SUBMODULES = {
+    "DepthServer": ".server",
+    "MicroBatcher": ".server",
+    "WorkerPool": ".worker_pool",
+}
+
+
+__all__ = [
+    "DepthServer",
+    "MicroBatcher",
+    "WorkerPool"
+]
+
+
+__getattr__, __dir__ = lazy(__name__, _SUBMODULES)
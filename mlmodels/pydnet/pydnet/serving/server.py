@@ -0,0 +1,229 @@
+"""Micro-Batching Depth Inference Server.
+"""
+
+import json
+import time
+import asyncio
+import cv2
+import numpy as np
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+
+
+async def read_message(
+    reader: asyncio.StreamReader
+) -> Optional[Tuple[str, Dict[str, str], bytes]]:
+    """Reads an HTTP/1.1 message, returns `None` once the peer is done.
+    """
+    start = await reader.readline()
+    if not start:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        key, value = line.decode("latin-1").split(":", 1)
+        headers[key.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return start.decode("latin-1").strip(), headers, body
+
+
+def write_message(
+    writer: asyncio.StreamWriter,
+    start: str,
+    headers: Dict[str, str],
+    body: bytes = b""
+) -> None:
+    """Writes an HTTP/1.1 message.
+    """
+    headers = dict(headers, **{"Content-Length": str(len(body))})
+    head = "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    writer.write(f"{start}\r\n{head}\r\n".encode("latin-1") + body)
+
+
+class MicroBatcher(object):
+    """Deadline-aware dynamic micro-batching of concurrent requests.
+
+    A batch is dispatched once it holds `max_batch` requests or once its
+    oldest request has waited `max_latency` seconds.
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[np.ndarray], np.ndarray],
+        max_batch: int = 8,
+        max_latency: float = 0.01
+    ):
+        """Inits `MicroBatcher` with a batched `predict` function.
+        """
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.queue = None
+        self.batch_sizes = Counter()
+        self.queue_depths = Counter()
+        self.requests = 0
+        self.latency = 0.0
+
+    async def submit(self, image: np.ndarray) -> np.ndarray:
+        """Enqueues a single image and waits for its prediction.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        arrival = loop.time()
+        await self.queue.put((image, future, arrival))
+        output = await future
+        self.requests += 1
+        self.latency += loop.time() - arrival
+        return output
+
+    async def run(self) -> None:
+        """Forms and runs batches until cancelled.
+        """
+        loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue()
+        while True:
+            batch = await self._collect(loop, await self.queue.get())
+            self.queue_depths[self.queue.qsize()] += 1
+            self.batch_sizes[len(batch)] += 1
+            images = np.stack([image for image, _, _ in batch])
+            try:
+                outputs = await loop.run_in_executor(
+                    None,
+                    self.predict,
+                    images)
+                outputs = np.reshape(
+                    outputs,
+                    (len(batch), -1) + outputs.shape[-1:])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future, _), output in zip(batch, outputs):
+                if not future.done():
+                    future.set_result(output)
+
+    async def _collect(self, loop, first) -> list:
+        """Forms a batch starting at `first`, bounded by its deadline.
+        """
+        batch = [first]
+        deadline = first[2] + self.max_latency
+        while len(batch) < self.max_batch:
+            # Requests that queued up behind a running batch join the
+            # next one even when its deadline has already passed.
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            # Unlike `wait_for`, cancelling a pending `get` never drops
+            # an item that arrives right at the deadline.
+            getter = asyncio.ensure_future(self.queue.get())
+            done, _ = await asyncio.wait([getter], timeout=timeout)
+            if getter not in done:
+                getter.cancel()
+                break
+            batch.append(getter.result())
+        return batch
+
+    def metrics(self) -> Dict[str, object]:
+        """Returns the queue depth and batch size histograms.
+        """
+        return {
+            "requests": self.requests,
+            "latency": self.latency / max(self.requests, 1),
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_depths": dict(sorted(self.queue_depths.items())),
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+
+class DepthServer(object):
+    """Local HTTP service serving PyDnet depth maps.
+
+    `POST /predict` takes an encoded image and returns the depth map as a
+    grayscale PNG of the network resolution, `GET /metrics` the batching
+    metrics as JSON.
+    """
+
+    def __init__(self, batcher: MicroBatcher, h: int, w: int):
+        """Inits `DepthServer` with `batcher` and the network resolution.
+        """
+        self.batcher = batcher
+        self.h = h
+        self.w = w
+        self.started = time.time()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080):
+        """Serves requests until cancelled.
+        """
+        runner = asyncio.ensure_future(self.batcher.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            runner.cancel()
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+    ) -> None:
+        """Handles a keep-alive client connection.
+        """
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                start, headers, body = message
+                status, content_type, payload = await self.route(start, body)
+                write_message(
+                    writer,
+                    f"HTTP/1.1 {status}",
+                    {"Content-Type": content_type},
+                    payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except ValueError:
+            # Malformed headers leave the stream at an unknown position.
+            write_message(
+                writer,
+                "HTTP/1.1 400 Bad Request",
+                {"Content-Type": "text/plain", "Connection": "close"},
+                b"Invalid headers")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, start: str, body: bytes) -> Tuple[str, str, bytes]:
+        """Dispatches a request, returns status, content type and payload.
+        """
+        parts = start.split(" ")
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            return "400 Bad Request", "text/plain", b"Invalid request line"
+        method, target, _ = parts
+        if method == "GET" and target == "/metrics":
+            metrics = dict(
+                self.batcher.metrics(),
+                uptime=time.time() - self.started)
+            return "200 OK", "application/json", json.dumps(metrics).encode()
+        if method != "POST" or target != "/predict":
+            return "404 Not Found", "text/plain", b"Not Found"
+        image = cv2.imdecode(np.frombuffer(body, np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return "400 Bad Request", "text/plain", b"Invalid image"
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        image = cv2.resize(image, (self.w, self.h)).astype(np.float32)
+        try:
+            depth = await self.batcher.submit(image)
+        except Exception as e:
+            return "500 Internal Server Error", "text/plain", str(e).encode()
+        _, png = cv2.imencode(".png", np.clip(depth, 0, 255).astype(np.uint8))
+        return "200 OK", "image/png", png.tobytes()
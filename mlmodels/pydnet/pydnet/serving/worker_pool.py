@@ -0,0 +1,274 @@
+"""Multi-Instance Inference Worker Pool.
+"""
+
+import os
+import time
+import queue
+import itertools
+import threading
+import psutil
+import numpy as np
+import tensorflow as tf
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import get_context
+from traceback import format_exc
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Union
+from pydnet.models.graph_utils import graph_outputs, load_graph
+
+
+POLL = 1.0
+
+
+def serve(
+    index: int,
+    path_to_pb: str,
+    input: str,
+    output: Optional[str],
+    threads: int,
+    cpus: Optional[Sequence[int]],
+    requests: object,
+    results: object
+) -> None:
+    """Runs a frozen graph on requests until `None`, in a worker process.
+
+    The ready message carries the traceback of a failed setup, if any.
+    """
+    try:
+        process = psutil.Process()
+        if cpus and hasattr(process, "cpu_affinity"):
+            process.cpu_affinity(list(cpus))
+        graph_def = load_graph(Path(path_to_pb))
+        output = output or graph_outputs(graph_def)[0]
+        graph = tf.Graph()
+        with graph.as_default():
+            tf.import_graph_def(graph_def, name="")
+        feed = graph.get_tensor_by_name(f"{input}:0")
+        fetch = graph.get_tensor_by_name(f"{output}:0")
+        config = tf.ConfigProto(
+            intra_op_parallelism_threads=threads,
+            inter_op_parallelism_threads=1)
+        sess = tf.Session(graph=graph, config=config)
+    except Exception:
+        results.put((None, index, None, format_exc()))
+        return
+    with sess:
+        results.put((None, index, None, None))
+        for task_id, image in iter(requests.get, None):
+            try:
+                output = sess.run(fetch, {feed: image})
+                results.put((task_id, index, output, None))
+            except Exception:
+                results.put((task_id, index, None, format_exc()))
+
+
+class WorkerPool(object):
+    """Pool of independent processes each running a frozen PyDnet graph.
+
+    Every worker owns a session with `threads` intra-op threads and,
+    if `affinity` is set, is pinned to its own cores. Requests are
+    dispatched `round_robin` or to the `least_loaded` worker.
+    """
+
+    def __init__(
+        self,
+        path_to_pb: Union[str, Path],
+        workers: int = 2,
+        threads: int = 1,
+        affinity: Union[bool, Sequence[Sequence[int]]] = False,
+        policy: str = "round_robin",
+        input: str = "In",
+        output: Optional[str] = None
+    ):
+        """Inits `WorkerPool` and waits until every worker is ready.
+
+        Raises `RuntimeError` if a worker fails to start.
+        """
+        if policy not in ("round_robin", "least_loaded"):
+            raise ValueError(f"Invalid dispatch policy: {policy}")
+        if affinity is True:
+            affinity = cpu_blocks(workers, threads)
+        elif not affinity:
+            affinity = [None] * workers
+        self.policy = policy
+        self.loads = [0] * workers
+        self.alive = [True] * workers
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.task_ids = itertools.count()
+        self.next = itertools.cycle(range(workers))
+        context = get_context("spawn")
+        self.results = context.Queue()
+        self.requests = [context.Queue() for _ in range(workers)]
+        self.processes = [
+            context.Process(
+                target=serve,
+                args=(i, str(path_to_pb), input, output, threads,
+                      affinity[i], self.requests[i], self.results),
+                daemon=True)
+            for i in range(workers)]
+        for process in self.processes:
+            process.start()
+        try:
+            self._wait()
+        except Exception:
+            for process in self.processes:
+                process.terminate()
+            raise
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.collector.start()
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.processes)
+
+    def submit(self, image: np.ndarray) -> Future:
+        """Submits a batch to a worker and returns the future of its output.
+
+        Workers known to be dead are skipped, the future fails right away
+        if none is left.
+        """
+        future = Future()
+        with self.lock:
+            if not any(self.alive):
+                future.set_exception(RuntimeError("Every worker exited"))
+                return future
+            if self.policy == "least_loaded":
+                index = min(
+                    (i for i in range(len(self)) if self.alive[i]),
+                    key=self.loads.__getitem__)
+            else:
+                index = next(self.next)
+                while not self.alive[index]:
+                    index = next(self.next)
+            task_id = next(self.task_ids)
+            self.loads[index] += 1
+            self.futures[task_id] = (index, future)
+        self.requests[index].put((task_id, image))
+        return future
+
+    def map(
+        self,
+        images: Iterable[np.ndarray],
+        inflight: Optional[int] = None
+    ) -> Iterator[np.ndarray]:
+        """Yields the outputs of `images` in submission order.
+
+        At most `inflight` batches, by default twice the number of
+        workers, are queued at any time.
+        """
+        inflight = inflight or 2 * len(self)
+        pending = deque()
+        for image in images:
+            pending.append(self.submit(image))
+            if len(pending) >= inflight:
+                yield pending.popleft().result()
+        for future in pending:
+            yield future.result()
+
+    def close(self) -> None:
+        """Stops every worker.
+
+        Futures still pending once the workers exited are failed.
+        """
+        for requests in self.requests:
+            requests.put(None)
+        for process in self.processes:
+            process.join()
+        self.results.put(None)
+        self.collector.join()
+        self._fail(range(len(self)), "Worker {} closed before it answered")
+
+    def _wait(self) -> None:
+        """Waits for the ready message of every worker.
+        """
+        ready = set()
+        while len(ready) < len(self):
+            try:
+                _, index, _, error = self.results.get(timeout=POLL)
+            except queue.Empty:
+                for index, process in enumerate(self.processes):
+                    if index not in ready and not process.is_alive():
+                        raise RuntimeError(
+                            f"Worker {index} exited with code "
+                            f"{process.exitcode} before it was ready")
+                continue
+            if error is not None:
+                raise RuntimeError(f"Worker {index} failed:\n{error}")
+            ready.add(index)
+
+    def _collect(self) -> None:
+        """Resolves futures as workers return results.
+
+        Workers are checked on every iteration, a dead worker is taken out
+        of dispatch at once and its futures are failed `POLL` seconds
+        later, leaving time to collect the results it sent before dying.
+        """
+        deadlines = {}
+        while True:
+            self._reap(deadlines)
+            try:
+                message = self.results.get(timeout=POLL)
+            except queue.Empty:
+                continue
+            if message is None:
+                return
+            task_id, index, output, error = message
+            with self.lock:
+                self.loads[index] -= 1
+                _, future = self.futures.pop(task_id)
+            if error is None:
+                future.set_result(output)
+            else:
+                future.set_exception(RuntimeError(error))
+
+    def _reap(self, deadlines: dict) -> None:
+        """Marks dead workers and fails their futures past the deadline.
+        """
+        now = time.monotonic()
+        for index, process in enumerate(self.processes):
+            if self.alive[index] and not process.is_alive():
+                with self.lock:
+                    self.alive[index] = False
+                deadlines[index] = now + POLL
+        expired = [i for i, deadline in deadlines.items() if deadline <= now]
+        for index in expired:
+            del deadlines[index]
+        if expired:
+            self._fail(expired, "Worker {} exited")
+
+    def _fail(self, workers: Iterable[int], reason: str) -> None:
+        """Fails the pending futures of `workers`.
+        """
+        workers = set(workers)
+        with self.lock:
+            failed = [
+                (task_id, index, future)
+                for task_id, (index, future) in self.futures.items()
+                if index in workers]
+            for task_id, index, _ in failed:
+                self.loads[index] -= 1
+                del self.futures[task_id]
+        for _, index, future in failed:
+            future.set_exception(RuntimeError(reason.format(index)))
+
+
+def cpu_blocks(workers: int, threads: int) -> List[List[int]]:
+    """Returns blocks of `threads` cores for `workers` workers.
+
+    Blocks are disjoint as long as enough cores are available.
+    """
+    process = psutil.Process()
+    if hasattr(process, "cpu_affinity"):
+        cpus = sorted(process.cpu_affinity())
+    else:
+        cpus = list(range(os.cpu_count()))
+    return [
+        [cpus[(i * threads + j) % len(cpus)] for j in range(threads)]
+        for i in range(workers)]
@@ -17,8 +17,19 @@ setup(
     entry_points={
         "console_scripts": [
             "pydnet_kitti_ground_truth = pydnet.cli.generate_kitti_ground_truth:main",
+            "pydnet_eval = pydnet.cli.evaluate_kitti:main",
             "pydnet_mlmodel = pydnet.cli.export_mlmodel:main",
             "pydnet_update_mlmodel = pydnet.cli.update_mlmodel:main",
+            "pydnet_onnx = pydnet.cli.export_onnx:main",
+            "pydnet_bench = pydnet.cli.benchmark_pydnet:main",
+            "pydnet_profile = pydnet.cli.profile_pydnet:main",
+            "pydnet_bench_pool = pydnet.cli.benchmark_pool:main",
+            "pydnet_serve = pydnet.cli.serve_pydnet:main",
+            "pydnet_load = pydnet.cli.load_pydnet:main",
+            "pydnet_stream = pydnet.cli.stream_pydnet:main",
+            "pydnet_tile = pydnet.cli.tile_pydnet:main",
+            "pydnet_export_matrix = pydnet.cli.export_matrix:main",
+            "pydnet_train = pydnet.cli.train_pydnet:main",
         ],
     },
     packages=find_packages(exclude=["test", "test.*"]))
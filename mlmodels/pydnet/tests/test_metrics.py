@@ -0,0 +1,145 @@
+"""Depth Metrics Tests.
+
+The reference implementations are those of the KITTI notebook.
+"""
+
+import numpy as np
+import pytest
+from pydnet.eval import (
+    DepthMetrics,
+    align_scale_and_shift,
+    compute_errors,
+    compute_scale_and_shift)
+
+
+MAX_DEPTH = 80.0
+
+
+def notebook_compute_errors(ground, pred):
+    """`compute_errors` of the KITTI notebook.
+    """
+    thresh = np.maximum((ground / pred), (pred / ground))
+    a1 = (thresh < 1.25).mean()
+    a2 = (thresh < 1.25 ** 2).mean()
+    a3 = (thresh < 1.25 ** 3).mean()
+    rmse = (ground - pred) ** 2
+    rmse = np.sqrt(rmse.mean())
+    rmse_log = (np.log(ground) - np.log(pred)) ** 2
+    rmse_log = np.sqrt(rmse_log.mean())
+    abs_rel = np.mean(np.abs(ground - pred) / ground)
+    sq_rel = np.mean(((ground - pred) ** 2) / ground)
+    return abs_rel, sq_rel, rmse, rmse_log, a1, a2, a3
+
+
+def notebook_compute_scale_and_shift(pred, target, mask):
+    """`compute_scale_and_shift` of the KITTI notebook.
+    """
+    a_00 = np.sum(mask * pred * pred)
+    a_01 = np.sum(mask * pred)
+    a_11 = np.sum(mask)
+    b_0 = np.sum(mask * pred * target)
+    b_1 = np.sum(mask * target)
+    x_0 = np.zeros_like(b_0)
+    x_1 = np.zeros_like(b_1)
+    det = a_00 * a_11 - a_01 * a_01
+    valid = det > 0
+    x_0[valid] = (a_11[valid] * b_0[valid] - a_01[valid] * b_1[valid])\
+        / det[valid]
+    x_1[valid] = (-a_01[valid] * b_0[valid] + a_00[valid] * b_1[valid])\
+        / det[valid]
+    return x_0, x_1
+
+
+def notebook_evaluate(pred, target):
+    """The per-frame evaluation loop body of the KITTI notebook.
+    """
+    mask = (target > 1e-3) & (target < MAX_DEPTH)
+    target_dep = np.zeros_like(target)
+    target_dep[mask == 1] = 1.0 / target[mask == 1]
+    scale, shift = notebook_compute_scale_and_shift(pred, target_dep, mask)
+    pred_aligned = scale * pred + shift
+    disparity_cap = 1.0 / MAX_DEPTH
+    pred_aligned[pred_aligned < disparity_cap] = disparity_cap
+    pred_aligned = 1.0 / pred_aligned
+    return notebook_compute_errors(target[mask == 1], pred_aligned[mask == 1])
+
+
+def sparse_frames(n, h=48, w=96, density=0.05, seed=0):
+    """Synthetic relative disparities and sparse LiDAR-like depths.
+    """
+    rng = np.random.RandomState(seed)
+    depth = rng.uniform(2.0, 100.0, (n, h, w))
+    ground = np.where(rng.rand(n, h, w) < density, depth, 0.0)
+    noise = rng.normal(1.0, 0.1, (n, h, w))
+    pred = (3.0 / depth + 0.01) * noise * 255.0
+    return pred, ground
+
+
+def test_compute_errors_matches_notebook():
+    pred, ground = sparse_frames(1)
+    mask = ground[0] > 0
+    expected = notebook_compute_errors(ground[0][mask], pred[0][mask])
+    np.testing.assert_allclose(
+        compute_errors(ground[0][mask], pred[0][mask]),
+        expected)
+
+
+def test_compute_errors_per_frame_offsets():
+    pred, ground = sparse_frames(3)
+    masks = ground > 0
+    offsets = np.cumsum([0] + [m.sum() for m in masks[:-1]])
+    errors = compute_errors(ground[masks], pred[masks], offsets)
+    for i, mask in enumerate(masks):
+        np.testing.assert_allclose(
+            errors[i],
+            notebook_compute_errors(ground[i][mask], pred[i][mask]))
+
+
+def test_compute_scale_and_shift_matches_notebook():
+    pred, ground = sparse_frames(1)
+    mask = ground[0] > 0
+    target = np.zeros_like(ground[0])
+    target[mask] = 1.0 / ground[0][mask]
+    expected = notebook_compute_scale_and_shift(pred[0], target, mask)
+    np.testing.assert_allclose(
+        compute_scale_and_shift(pred[0][mask], target[mask]),
+        expected)
+
+
+def test_compute_scale_and_shift_degenerate():
+    scale, shift = compute_scale_and_shift(
+        np.ones(4),
+        np.arange(4.0),
+        np.array([0, 1]))
+    np.testing.assert_array_equal(scale, [0.0, 0.0])
+    np.testing.assert_array_equal(shift, [0.0, 0.0])
+
+
+@pytest.mark.parametrize("batch", [1, 4])
+def test_depth_metrics_matches_notebook(batch):
+    pred, ground = sparse_frames(8)
+    # A frame without valid pixels is skipped by both.
+    ground[3] = 0.0
+    metrics = DepthMetrics(MAX_DEPTH)
+    for i in range(0, len(pred), batch):
+        metrics.update(pred[i:i + batch], ground[i:i + batch])
+    expected = np.mean(
+        [notebook_evaluate(p, g) for p, g in zip(pred, ground) if g.any()],
+        axis=0)
+    np.testing.assert_allclose(
+        list(metrics.result().values()),
+        expected)
+    assert metrics.count == len(pred) - 1
+
+
+def test_align_scale_and_shift_caps_disparity():
+    pred, ground = sparse_frames(2)
+    ground_valid, aligned, offsets = align_scale_and_shift(
+        pred,
+        ground,
+        MAX_DEPTH)
+    assert (aligned <= MAX_DEPTH + 1e-9).all()
+    assert ((ground_valid > 1e-3) & (ground_valid < MAX_DEPTH)).all()
+    np.testing.assert_array_equal(
+        offsets,
+        [0, ((ground[0] > 1e-3) & (ground[0] < MAX_DEPTH)).sum()])